@@ -8,6 +8,8 @@ from tkinter import ttk, messagebox
 import sqlite3
 import json
 
+import stats_db
+
 class AttributeManager:
     def __init__(self):
         self.root = tk.Tk()
@@ -15,10 +17,9 @@ class AttributeManager:
         self.root.geometry("800x600")
         self.root.configure(bg='#1a1a1a')
         
-        # Database connection
-        self.conn = sqlite3.connect('game_stats.db')
+        # Database connection (creates player_attributes if needed)
+        self.conn = stats_db.connect()
         self.cursor = self.conn.cursor()
-        self.ensure_tables()
         
         # Style
         style = ttk.Style()
@@ -30,19 +31,6 @@ class AttributeManager:
         self.setup_ui()
         self.load_users()
         
-    def ensure_tables(self):
-        """Ensure the player_attributes table exists"""
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS player_attributes (
-                username TEXT PRIMARY KEY,
-                bonus_hp INTEGER DEFAULT 0,
-                bonus_strength INTEGER DEFAULT 0,
-                bonus_armor INTEGER DEFAULT 0,
-                bonus_luck INTEGER DEFAULT 0
-            )
-        ''')
-        self.conn.commit()
-    
     def setup_ui(self):
         # Title
         title_frame = tk.Frame(self.root, bg='#1a1a1a')
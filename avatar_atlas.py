@@ -0,0 +1,216 @@
+"""
+Avatar Atlas
+Decodes profile pictures in parallel and packs them into a few atlas
+pages saved under cache/avatars, with a JSON index. Later launches load
+the pages instead of thousands of JPEGs, as long as no source changed.
+
+Each slot holds the source picture (AVATAR_TILE x AVATAR_TILE) with the
+circular sprite at the spawn size right below it, so fighters spawn
+without any scaling or masking work. Only the spawn size is prebuilt: as
+fighters grow (up to MAX_SIZE + 20) AvatarCache masks each new size on
+first use, scaling down from the tile. AVATAR_TILE is larger than any
+fighter; the winner portrait is bigger, so it is cut from the original
+file instead (AvatarCache.source).
+
+Pages are stored as raw RGBA: about 110 KB per avatar on disk, but
+loading is a plain read instead of a JPEG or PNG decode.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None  # Fall back to decoding with pygame, one file at a time
+
+from render_cache import AvatarCache
+from simulation import INITIAL_SIZE
+
+ATLAS_DIR = os.path.join('cache', 'avatars')
+INDEX_FILE = 'atlas_index.json'
+ATLAS_VERSION = 2
+AVATAR_TILE = 150  # Instagram serves 150x150 pictures
+PAGE_COLUMNS = 16
+PAGE_ROWS = 8
+SLOT_HEIGHT = AVATAR_TILE + INITIAL_SIZE
+
+
+def source_signature(path):
+    """(mtime, size) of a source file, or (None, None) if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, None
+    return stat.st_mtime, stat.st_size
+
+
+def write_atomic(path, data):
+    """Write to a temp file and rename it into place - readers never see half a file"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def decode_avatar(path):
+    """
+    Decode one picture to ((width, height), RGBA bytes) at the tile size, or
+    None if it can't be read. Runs on worker threads - Pillow releases the
+    GIL while decoding and resizing, so no pygame calls here.
+    """
+    try:
+        with Image.open(path) as image:
+            image = image.convert('RGBA')
+            if image.size != (AVATAR_TILE, AVATAR_TILE):
+                image = image.resize((AVATAR_TILE, AVATAR_TILE))
+            return image.size, image.tobytes()
+    except Exception:
+        return None
+
+
+def decode_all(paths, workers=None):
+    """Decode pictures into pygame surfaces - {path: surface}, unreadable ones skipped"""
+    surfaces = {}
+
+    if Image is None:
+        for path in paths:
+            try:
+                surface = pygame.image.load(path).convert_alpha()
+            except (pygame.error, FileNotFoundError):
+                continue
+            if surface.get_size() != (AVATAR_TILE, AVATAR_TILE):
+                surface = pygame.transform.scale(surface, (AVATAR_TILE, AVATAR_TILE))
+            surfaces[path] = surface
+        return surfaces
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for path, decoded in zip(paths, pool.map(decode_avatar, paths)):
+            if decoded is not None:
+                size, pixels = decoded
+                surfaces[path] = pygame.image.frombuffer(pixels, size, 'RGBA').convert_alpha()
+    return surfaces
+
+
+def slot_rects(slot):
+    """Page number plus source and masked-sprite rects of an atlas slot"""
+    page, index = divmod(slot, PAGE_COLUMNS * PAGE_ROWS)
+    row, column = divmod(index, PAGE_COLUMNS)
+    x, y = column * AVATAR_TILE, row * SLOT_HEIGHT
+    source = pygame.Rect(x, y, AVATAR_TILE, AVATAR_TILE)
+    masked = pygame.Rect(x, y + AVATAR_TILE, INITIAL_SIZE, INITIAL_SIZE)
+    return page, source, masked
+
+
+def build_atlas(paths, cache_dir=ATLAS_DIR, workers=None):
+    """Decode, mask and pack every picture, then save the pages and index"""
+    surfaces = decode_all(paths, workers)
+    masker = AvatarCache()
+
+    page_count = -(-len(surfaces) // (PAGE_COLUMNS * PAGE_ROWS))
+    pages = [
+        pygame.Surface((PAGE_COLUMNS * AVATAR_TILE, PAGE_ROWS * SLOT_HEIGHT), pygame.SRCALPHA)
+        for _ in range(page_count)
+    ]
+    for page in pages:
+        page.fill((0, 0, 0, 0))
+
+    entries = {}
+    slot = 0
+    for path in paths:
+        mtime, size = source_signature(path)
+        entry = {'mtime': mtime, 'bytes': size, 'slot': None}
+        surface = surfaces.get(path)
+        if surface is not None:
+            page, source_rect, masked_rect = slot_rects(slot)
+            masker.decoded[path] = surface
+            # Adding onto the cleared page copies pixels as-is, alpha included
+            pages[page].blit(surface, source_rect, special_flags=pygame.BLEND_RGBA_ADD)
+            pages[page].blit(masker.build_masked(path, INITIAL_SIZE), masked_rect,
+                             special_flags=pygame.BLEND_RGBA_ADD)
+            entry['slot'] = slot
+            slot += 1
+        entries[path] = entry
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # The old index goes first and the new one is written last, so a build
+    # interrupted halfway never leaves an index describing other pages
+    try:
+        os.remove(os.path.join(cache_dir, INDEX_FILE))
+    except FileNotFoundError:
+        pass
+
+    page_files = []
+    for number, page in enumerate(pages):
+        filename = f'atlas_{number}.rgba'
+        write_atomic(os.path.join(cache_dir, filename), pygame.image.tobytes(page, 'RGBA'))
+        page_files.append(filename)
+
+    index = {
+        'version': ATLAS_VERSION,
+        'tile': AVATAR_TILE,
+        'masked_size': INITIAL_SIZE,
+        'page_size': [PAGE_COLUMNS * AVATAR_TILE, PAGE_ROWS * SLOT_HEIGHT],
+        'pages': page_files,
+        'entries': entries,
+    }
+    write_atomic(os.path.join(cache_dir, INDEX_FILE), json.dumps(index).encode())
+    return index, pages
+
+
+def load_index(paths, cache_dir=ATLAS_DIR):
+    """The saved index if it still matches the source files, else None"""
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (index.get('version') != ATLAS_VERSION or index.get('tile') != AVATAR_TILE
+            or index.get('masked_size') != INITIAL_SIZE):
+        return None
+
+    entries = index['entries']
+    for path in paths:
+        entry = entries.get(path)
+        if entry is None or source_signature(path) != (entry['mtime'], entry['bytes']):
+            return None
+    return index
+
+
+def load_avatar_atlas(paths, cache_dir=ATLAS_DIR, workers=None):
+    """
+    Surfaces for a roster: {path: (source, masked sprite at INITIAL_SIZE)}.
+    Both are subsurfaces of the atlas pages. Missing or unreadable files
+    are left out so callers fall back as usual.
+    Needs a display mode to be set (convert_alpha).
+    """
+    paths = list(dict.fromkeys(path for path in paths if path))
+    index = load_index(paths, cache_dir)
+
+    pages = None
+    if index is not None:
+        try:
+            pages = []
+            for filename in index['pages']:
+                with open(os.path.join(cache_dir, filename), 'rb') as f:
+                    pixels = f.read()
+                pages.append(pygame.image.frombuffer(pixels, index['page_size'], 'RGBA').convert_alpha())
+        except (OSError, ValueError, pygame.error):
+            pages = None  # Missing or truncated page - rebuild
+
+    if pages is None:
+        print(f"🖼️  Construindo atlas de avatares ({len(paths)} imagens)...")
+        index, pages = build_atlas(paths, cache_dir, workers)
+
+    avatars = {}
+    for path in paths:
+        slot = index['entries'][path]['slot']
+        if slot is None:
+            continue
+        page, source_rect, masked_rect = slot_rects(slot)
+        avatars[path] = (pages[page].subsurface(source_rect), pages[page].subsurface(masked_rect))
+    return avatars
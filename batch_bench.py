@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Batch Simulator Scaling Benchmark
+Plays the same seeded matches with different worker counts, checks the
+results are identical to the serial run and reports matches per second
+and the speedup over workers=1.
+
+Synthetic fighters, no attribute bonuses - game_stats.db is not read.
+
+Usage:
+    python batch_bench.py --matches 48 --players 100 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+from batch_simulator import run_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure batch_simulator scaling across worker processes")
+    parser.add_argument('--matches', type=int, default=48, help="matches per run")
+    parser.add_argument('--players', type=int, default=100, help="synthetic fighters per match")
+    parser.add_argument('--max-ticks', type=int, default=600, help="stop each match after this many ticks")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first match")
+    parser.add_argument('--batched', action='store_true', help="use the approximate NumPy contact pass")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help="worker counts to try")
+    args = parser.parse_args()
+
+    roster = [{'instagram_username': f"fighter_{n:04d}", 'is_active_follower': True}
+              for n in range(args.players)]
+    workers_list = sorted(set(args.workers) | {1})
+
+    print(f"🎲 {args.matches} partidas, {args.players} lutadores, até {args.max_ticks} ticks - "
+          f"{os.cpu_count()} núcleo(s)")
+    serial = serial_seconds = None
+    for workers in workers_list:
+        start = time.perf_counter()
+        results = run_batch(roster, args.matches, args.seed, args.max_ticks,
+                            batched=args.batched, workers=workers, attributes={})
+        seconds = time.perf_counter() - start
+
+        if serial is None:
+            serial, serial_seconds = results, seconds
+        status = "✅" if results == serial else "❌ resultados diferentes"
+        print(f"{workers:>3} processo(s) {seconds:>8.2f}s {args.matches / seconds:>8.2f} partidas/s "
+              f"{serial_seconds / seconds:>6.2f}x {status}")
+
+
+if __name__ == "__main__":
+    main()
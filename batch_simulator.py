@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Batch Battle Simulator
+Runs many seeded headless matches as fast as the CPU allows and reports
+per-player balance statistics (win rate, placement, kills, damage).
+
+Results go to their own SQLite store (batch_results.db), never through
+game_logger, so offline studies don't pollute the live game statistics.
+
+Usage:
+    python batch_simulator.py --matches 1000 --seed 42
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from simulation import TICK_MS, Fighter, MatchRandom, load_attribute_table
+from vector_simulation import VectorizedSimulation
+
+RESULTS_DB = 'batch_results.db'
+Z_95 = 1.96  # Normal quantile for 95% confidence intervals
+
+
+def load_active_users(path):
+    """Active followers from a users.json file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        users = json.load(f)
+    return [user for user in users if user.get("is_active_follower")]
+
+
+def simulate_match(roster, seed, max_ticks=None, batched=False, attributes=None):
+    """
+    Play one headless match and return its result as a plain dict.
+
+    Placement is shared by fighters eliminated in the same tick: with 10
+    left, three dying together all finish 8th. Fighters still alive when
+    max_ticks runs out share 1st place without a win. `attributes` is the
+    preloaded bonus table (load_attribute_table) - read it once per batch.
+
+    By default the match follows the game's rules exactly, hit for hit.
+    batched=True uses the faster NumPy contact pass, which resolves
+    push-created contacts a tick late and rolls crits from its own stream:
+    statistically close, but not the game main.py plays.
+    """
+    rng = MatchRandom(seed)
+    fighters = [Fighter(user, rng, attributes) for user in roster]
+    players = {
+        fighter.username: {'placement': 1, 'kills': 0, 'damage_dealt': 0, 'damage_taken': 0}
+        for fighter in fighters
+    }
+
+    def on_hit(attacker, victim, damage, critical):
+        players[attacker.username]['damage_dealt'] += damage
+        players[victim.username]['damage_taken'] += damage
+
+    def on_kill(killer, victim):
+        players[killer.username]['kills'] += 1
+
+    simulation = VectorizedSimulation(fighters, on_hit=on_hit, on_kill=on_kill,
+                                      batched=batched, rng=rng)
+    while not simulation.finished and (max_ticks is None or simulation.tick < max_ticks):
+        eliminated = simulation.step()
+        for fighter in eliminated:
+            players[fighter.username]['placement'] = len(simulation.fighters) + 1
+
+    winner = simulation.winner.username if simulation.winner else None
+    return {
+        'seed': seed,
+        'winner': winner,
+        'ticks': simulation.tick,
+        'duration_seconds': simulation.tick * TICK_MS / 1000,
+        'players': players,
+    }
+
+
+def mean_interval(count, total, squares):
+    """Mean and 95% half-width (normal approximation) from running sums"""
+    mean = total / count
+    if count < 2:
+        return mean, 0.0
+    variance = max(0.0, (squares - total * mean) / (count - 1))
+    return mean, Z_95 * math.sqrt(variance / count)
+
+
+def wilson_interval(wins, total):
+    """95% Wilson score interval for a win rate - well behaved near 0 and 1"""
+    if total == 0:
+        return 0.0, 0.0
+    rate = wins / total
+    denominator = 1 + Z_95 ** 2 / total
+    center = (rate + Z_95 ** 2 / (2 * total)) / denominator
+    spread = Z_95 * math.sqrt(rate * (1 - rate) / total + Z_95 ** 2 / (4 * total ** 2)) / denominator
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+class BatchSummary:
+    """
+    Per-player statistics gathered one match at a time - running sums
+    only, so a batch of any size is summarized in constant memory.
+    """
+
+    METRICS = ('placement', 'kills', 'damage_dealt')
+
+    def __init__(self):
+        self.players = {}
+
+    def add(self, result):
+        for username, stats in result['players'].items():
+            totals = self.players.get(username)
+            if totals is None:
+                totals = self.players[username] = {'matches': 0, 'wins': 0}
+                for metric in self.METRICS:
+                    totals[metric] = [0.0, 0.0]  # Sum, sum of squares
+            totals['matches'] += 1
+            totals['wins'] += result['winner'] == username
+            for metric in self.METRICS:
+                value = stats[metric]
+                totals[metric][0] += value
+                totals[metric][1] += value * value
+
+    def rows(self):
+        """Per-player statistics, best win rate first"""
+        summary = []
+        for username, totals in self.players.items():
+            matches, wins = totals['matches'], totals['wins']
+            row = {
+                'username': username,
+                'matches': matches,
+                'wins': wins,
+                'win_rate': wins / matches,
+                'win_rate_ci': wilson_interval(wins, matches),
+            }
+            for metric in self.METRICS:
+                row[metric] = mean_interval(matches, *totals[metric])
+            summary.append(row)
+
+        summary.sort(key=lambda row: (-row['win_rate'], row['placement'][0], row['username']))
+        return summary
+
+
+def summarize(results):
+    """Aggregate match results into per-player statistics, best win rate first"""
+    summary = BatchSummary()
+    for result in results:
+        summary.add(result)
+    return summary.rows()
+
+
+def init_results_db(db_path=RESULTS_DB):
+    """Open the batch results store, creating its tables if needed"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS batch_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP,
+            roster TEXT,
+            base_seed INTEGER,
+            matches INTEGER,
+            wall_seconds REAL
+        );
+
+        CREATE TABLE IF NOT EXISTS batch_matches (
+            run_id INTEGER,
+            match_index INTEGER,
+            seed INTEGER,
+            winner TEXT,
+            ticks INTEGER,
+            duration_seconds REAL,
+            PRIMARY KEY (run_id, match_index),
+            FOREIGN KEY (run_id) REFERENCES batch_runs(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS batch_player_results (
+            run_id INTEGER,
+            match_index INTEGER,
+            username TEXT,
+            placement INTEGER,
+            kills INTEGER,
+            damage_dealt REAL,
+            damage_taken REAL,
+            FOREIGN KEY (run_id) REFERENCES batch_runs(id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_batch_player_results_user
+            ON batch_player_results (run_id, username);
+    ''')
+    return conn
+
+
+def save_results(results, roster_path, base_seed, db_path=RESULTS_DB, on_result=None):
+    """
+    Write a batch to the results store as its matches arrive, in a single
+    transaction. `results` may be a generator (iter_batch) - nothing is
+    held back in memory. on_result(result) is called after each match is
+    written. Returns (run id, matches, wall seconds).
+    """
+    start = time.perf_counter()
+    conn = init_results_db(db_path)
+    try:
+        with conn:
+            cursor = conn.execute('''
+                INSERT INTO batch_runs (started_at, roster, base_seed, matches, wall_seconds)
+                VALUES (?, ?, ?, 0, NULL)
+            ''', (datetime.now(), roster_path, base_seed))
+            run_id = cursor.lastrowid
+
+            matches = 0
+            for index, result in enumerate(results):
+                conn.execute('''
+                    INSERT INTO batch_matches (run_id, match_index, seed, winner, ticks, duration_seconds)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (run_id, index, result['seed'], result['winner'], result['ticks'], result['duration_seconds']))
+
+                conn.executemany('''
+                    INSERT INTO batch_player_results
+                    (run_id, match_index, username, placement, kills, damage_dealt, damage_taken)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [
+                    (run_id, index, username, stats['placement'], stats['kills'],
+                     stats['damage_dealt'], stats['damage_taken'])
+                    for username, stats in result['players'].items()
+                ])
+                matches += 1
+                if on_result:
+                    on_result(result)
+
+            wall_seconds = time.perf_counter() - start
+            conn.execute('UPDATE batch_runs SET matches = ?, wall_seconds = ? WHERE id = ?',
+                         (matches, wall_seconds, run_id))
+    finally:
+        conn.close()
+    return run_id, matches, wall_seconds
+
+
+# Per-process match settings, set once by the pool initializer so the
+# roster is pickled once per worker instead of once per match
+_worker_settings = None
+
+
+def _init_worker(roster, max_ticks, batched, attributes):
+    global _worker_settings
+    _worker_settings = (roster, max_ticks, batched, attributes)
+
+
+def _play_seed(seed):
+    roster, max_ticks, batched, attributes = _worker_settings
+    return simulate_match(roster, seed, max_ticks, batched, attributes)
+
+
+def iter_batch(roster, matches, base_seed, max_ticks=None, batched=False, workers=1, attributes=None):
+    """
+    Play `matches` matches with seeds base_seed, base_seed + 1, ... and
+    yield each result as it is ready, in seed order.
+
+    With workers > 1 the seeds are sharded across a process pool. Every
+    match is fully determined by its seed, so the output is identical to
+    a serial run.
+    """
+    if attributes is None:
+        attributes = load_attribute_table()
+
+    seeds = range(base_seed, base_seed + matches)
+    if workers <= 1 or matches <= 1:
+        for seed in seeds:
+            yield simulate_match(roster, seed, max_ticks, batched, attributes)
+        return
+
+    # Small chunks keep cores busy when match lengths vary a lot
+    chunksize = max(1, matches // (workers * 8))
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(roster, max_ticks, batched, attributes)) as pool:
+        yield from pool.imap(_play_seed, seeds, chunksize)
+
+
+def run_batch(roster, matches, base_seed, max_ticks=None, batched=False, workers=1, attributes=None):
+    """iter_batch collected into a list"""
+    return list(iter_batch(roster, matches, base_seed, max_ticks, batched, workers, attributes))
+
+
+def print_summary(summary, matches, wall_seconds, top, batched=False):
+    engine = "motor aproximado --batched" if batched else "regras do jogo"
+    print("=" * 96)
+    print(f"🎲 {matches} partidas ({engine}) em {wall_seconds:.1f}s "
+          f"({matches / max(wall_seconds, 1e-9):.1f} partidas/s)")
+    print("=" * 96)
+    print(f"{'#':<4} {'Username':<28} {'Vitórias':>16} {'Posição média':>16} {'Kills':>14} {'Dano':>14}")
+    print("-" * 96)
+
+    for rank, row in enumerate(summary[:top], 1):
+        low, high = row['win_rate_ci']
+        win_rate = f"{row['win_rate'] * 100:.1f}% [{low * 100:.0f}-{high * 100:.0f}]"
+        placement = f"{row['placement'][0]:.1f} ±{row['placement'][1]:.1f}"
+        kills = f"{row['kills'][0]:.2f} ±{row['kills'][1]:.2f}"
+        damage = f"{row['damage_dealt'][0]:.0f} ±{row['damage_dealt'][1]:.0f}"
+        print(f"{rank:<4} {row['username'][:28]:<28} {win_rate:>16} {placement:>16} {kills:>14} {damage:>14}")
+
+    if len(summary) > top:
+        print(f"\n... e mais {len(summary) - top} jogadores")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seeded headless matches for balance studies")
+    parser.add_argument('--matches', type=int, default=100, help="number of matches to play")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first match (match k uses seed + k)")
+    parser.add_argument('--users', default='users.json', help="roster file")
+    parser.add_argument('--max-ticks', type=int, default=None, help="stop a match after this many ticks")
+    parser.add_argument('--batched', action='store_true',
+                        help="approximate NumPy contact pass - faster in crowded arenas, but "
+                             "not trace-identical to the game (contacts a tick late, own crit rolls)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: all cores, 1 = serial)")
+    parser.add_argument('--db', default=RESULTS_DB, help="results database")
+    parser.add_argument('--top', type=int, default=20, help="players to show in the summary")
+    args = parser.parse_args()
+
+    roster = load_active_users(args.users)
+    print(f"👥 {len(roster)} jogadores ativos em {args.users} - {args.workers} processo(s)")
+    if args.batched:
+        print("⚠️  Motor aproximado (--batched): estatísticas próximas, mas não as partidas do jogo")
+
+    summary = BatchSummary()
+    results = iter_batch(roster, args.matches, args.seed, args.max_ticks,
+                         batched=args.batched, workers=args.workers)
+    run_id, matches, wall_seconds = save_results(results, args.users, args.seed, args.db,
+                                                 on_result=summary.add)
+    print_summary(summary.rows(), matches, wall_seconds, args.top, args.batched)
+    print(f"\n💾 Resultados salvos em {args.db} (run #{run_id})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Follower Extraction Benchmark
+Loads the saved followers dialog (fixtures/followers_dialog.html) in
+headless Chrome, checks that the one-call extraction returns exactly what
+the old per-element WebDriver loop did, and times both.
+
+--followers grows the list by cloning the first row under new usernames,
+so the timings reflect a dialog with thousands of followers loaded.
+
+--debugger-address attaches to a Chrome that is already running with
+--remote-debugging-port; with --keep-page the followers dialog open in it
+(a real one, from a logged-in scraper session) is checked instead of the
+fixture.
+
+Usage:
+    python collect_bench.py --followers 2000
+    python collect_bench.py --debugger-address 127.0.0.1:9222 --keep-page
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+
+from smart_scraper import COLLECT_FOLLOWERS_SCRIPT
+
+FIXTURE = os.path.join('fixtures', 'followers_dialog.html')
+
+
+def collect_per_element(dialog, max_collect=None):
+    """The old collect_loaded_followers loop: several WebDriver calls per link"""
+    followers = []
+    seen = set()
+
+    links = dialog.find_elements(By.XPATH, ".//a[contains(@href, '/')]")
+    buttons = dialog.find_elements(By.XPATH, ".//div[@role='button']")
+    spans = dialog.find_elements(By.XPATH, ".//span[contains(@class, '_ap3a')]")
+
+    for element in links:
+        try:
+            href = element.get_attribute('href')
+            if not href or '/p/' in href or '/explore' in href or '/reels' in href:
+                continue
+            parts = href.rstrip('/').split('/')
+            if len(parts) < 4:
+                continue
+            username = parts[-1]
+            if not username or username in seen or len(username) < 2:
+                continue
+            seen.add(username)
+
+            profile_pic = None
+            try:
+                parent = element
+                for _ in range(5):
+                    parent = parent.find_element(By.XPATH, '..')
+                    for img in parent.find_elements(By.TAG_NAME, 'img'):
+                        src = img.get_attribute('src')
+                        if src and 'blank.gif' not in src and ('/v/' in src or 'scontent' in src):
+                            profile_pic = src
+                            break
+                    if profile_pic:
+                        break
+            except:
+                pass
+            followers.append({'username': username, 'profile_pic_url': profile_pic})
+        except Exception:
+            continue
+
+    if len(followers) < (max_collect or 100):
+        for element in buttons + spans:
+            try:
+                text = element.text.strip()
+                if text and len(text) > 1 and text not in seen:
+                    if not any(word in text.lower() for word in ['follow', 'following', 'remove', 'message']):
+                        seen.add(text)
+                        profile_pic = None
+                        try:
+                            parent = element.find_element(By.XPATH, './ancestor::div[2]')
+                            profile_pic = parent.find_element(By.XPATH, './/img').get_attribute('src')
+                        except:
+                            pass
+                        followers.append({'username': text, 'profile_pic_url': profile_pic})
+                        if max_collect and len(followers) >= max_collect:
+                            break
+            except:
+                continue
+    return followers
+
+
+def grow_list(driver, dialog, count):
+    """Clone the first follower row until the list has `count` rows"""
+    driver.execute_script('''
+        var list = arguments[0].querySelector("div[style*='overflow']");
+        var row = list.firstElementChild;
+        var name = row.querySelector("span[class*='_ap3a']").textContent;
+        var html = [];
+        for (var n = list.children.length; n < arguments[1]; n++) {
+            html.push(row.outerHTML.split(name).join('follower_' + n));
+        }
+        list.insertAdjacentHTML('beforeend', html.join(''));
+    ''', dialog, count)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time follower extraction on the saved dialog")
+    parser.add_argument('--followers', type=int, default=0, help="grow the list to this many rows (0 = fixture as saved)")
+    parser.add_argument('--max-collect', type=int, default=None, help="max_collect passed to both extractions")
+    parser.add_argument('--debugger-address', help="attach to a running Chrome (host:port) instead of launching one")
+    parser.add_argument('--keep-page', action='store_true', help="check the dialog already open in the attached Chrome")
+    args = parser.parse_args()
+
+    options = Options()
+    if args.debugger_address:
+        options.debugger_address = args.debugger_address
+    else:
+        options.add_argument('--headless=new')
+    driver = webdriver.Chrome(options=options)
+    try:
+        if not (args.debugger_address and args.keep_page):
+            driver.get(Path(FIXTURE).resolve().as_uri())
+        dialog = driver.find_element(By.XPATH, "//div[@role='dialog']")
+        if args.followers:
+            grow_list(driver, dialog, args.followers)
+
+        old, old_seconds = timed(collect_per_element, dialog, args.max_collect)
+        new, new_seconds = timed(driver.execute_script, COLLECT_FOLLOWERS_SCRIPT, dialog, args.max_collect)
+        new = new['followers']
+
+        print(f"🧪 {len(old)} seguidores extraídos - {driver.capabilities.get('browserName')} "
+              f"{driver.capabilities.get('browserVersion')}")
+        print(f"por elemento (antigo) {old_seconds:>8.2f}s")
+        print(f"execute_script        {new_seconds:>8.2f}s ({old_seconds / new_seconds:.0f}x)")
+        if old == new:
+            print("✅ Resultados idênticos")
+        else:
+            print(f"❌ Resultados diferentes ({len(old)} antes, {len(new)} agora)")
+            for before, after in zip(old, new):
+                if before != after:
+                    print(f"  antigo: {before}\n  novo:   {after}")
+                    break
+            raise SystemExit(1)
+    finally:
+        if args.debugger_address:
+            driver.service.stop()  # Leave the attached browser running
+        else:
+            driver.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Picture Download Benchmark
+Runs picture_downloader against a local stand-in for the Instagram CDN
+and reports throughput next to the old one-at-a-time loop.
+
+The stand-in serves /pic/<n>.jpg with a configurable delay per request
+and can fail a share of requests with 503 to exercise the retries.
+
+Usage:
+    python download_bench.py --pictures 200 --latency 0.1 --workers 16
+"""
+
+import argparse
+import http.server
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+
+from picture_downloader import PictureDownloader
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Picture server with artificial latency - settings live on the server object"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real CDN
+    disable_nagle_algorithm = True  # Or delayed ACKs add ~40 ms per response
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+
+        with server.lock:
+            server.requests += 1
+            fail = server.failures.random() < server.fail_rate
+
+        if fail:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(server.picture)))
+        self.end_headers()
+        self.wfile.write(server.picture)
+
+    def log_message(self, format, *args):
+        pass  # Quiet
+
+
+def start_stand_in(latency, fail_rate, picture_kb, seed=0):
+    """Serve pictures on a free local port - returns the running server"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_rate = fail_rate
+    server.failures = random.Random(seed)
+    server.lock = threading.Lock()
+    server.requests = 0
+    # JPEG markers around random bytes - nobody decodes these
+    server.picture = b'\xff\xd8\xff\xe0' + os.urandom(picture_kb * 1024) + b'\xff\xd9'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def download_sequential(items, directory):
+    """The old loop: one bare requests.get after another, whole body in memory"""
+    downloaded = 0
+    for username, url in items:
+        try:
+            response = requests.get(url, timeout=10)
+            if response.status_code == 200:
+                with open(os.path.join(directory, f"{username}.jpg"), 'wb') as f:
+                    f.write(response.content)
+                downloaded += 1
+        except requests.RequestException:
+            pass
+    return downloaded
+
+
+def report(label, downloaded, total, seconds, requests_made, picture_bytes):
+    print(f"{label:<28} {downloaded:>5}/{total:<5} {seconds:>7.2f}s "
+          f"{downloaded / seconds:>8.1f} fotos/s {downloaded * picture_bytes / seconds / 1e6:>7.2f} MB/s "
+          f"({requests_made} requisições)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark picture downloads against a local stand-in server")
+    parser.add_argument('--pictures', type=int, default=200, help="pictures to download")
+    parser.add_argument('--latency', type=float, default=0.1, help="stand-in delay per request, seconds")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument('--size', type=int, default=8, help="picture size in KB")
+    parser.add_argument('--workers', type=int, nargs='+', default=[4, 16], help="worker counts to try")
+    parser.add_argument('--rate', type=float, default=0, help="per-host requests/s (0 = unlimited)")
+    parser.add_argument('--skip-sequential', action='store_true', help="don't time the old loop")
+    args = parser.parse_args()
+
+    server = start_stand_in(args.latency, args.fail_rate, args.size)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/pic"
+    items = [(f"user{n}", f"{base_url}/{n}.jpg") for n in range(args.pictures)]
+    picture_bytes = len(server.picture)
+
+    print(f"🖼️  {args.pictures} fotos de {args.size} KB, latência {args.latency * 1000:.0f} ms, "
+          f"{args.fail_rate * 100:.0f}% de falhas")
+    try:
+        if not args.skip_sequential:
+            directory = tempfile.mkdtemp()
+            try:
+                server.requests = 0
+                start = time.perf_counter()
+                downloaded = download_sequential(items, directory)
+                report("sequencial (antigo)", downloaded, len(items), time.perf_counter() - start,
+                       server.requests, picture_bytes)
+            finally:
+                shutil.rmtree(directory)
+
+        for workers in args.workers:
+            directory = tempfile.mkdtemp()
+            try:
+                server.requests = 0
+                downloader = PictureDownloader(directory, workers=workers, per_host_rate=args.rate,
+                                               backoff=0.05)
+                start = time.perf_counter()
+                results = downloader.download_all(items)
+                seconds = time.perf_counter() - start
+                downloader.close()
+
+                downloaded = sum(1 for result in results.values() if result)
+                leftovers = [name for name in os.listdir(directory) if name.endswith('.part')]
+                report(f"{workers} workers", downloaded, len(items), seconds, server.requests, picture_bytes)
+                if leftovers:
+                    print(f"  ⚠️ {len(leftovers)} arquivos temporários sobraram")
+            finally:
+                shutil.rmtree(directory)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,16 @@
 Editor Simples de Atributos - Fight Club
 """
 
-import sqlite3
 import os
 
+import stats_db
+
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def ensure_database():
-    conn = sqlite3.connect('game_stats.db')
+    conn = stats_db.connect()  # Creates player_attributes if needed
     cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS player_attributes (
-            username TEXT PRIMARY KEY,
-            bonus_hp INTEGER DEFAULT 0,
-            bonus_strength INTEGER DEFAULT 0,
-            bonus_armor INTEGER DEFAULT 0,
-            bonus_luck INTEGER DEFAULT 0
-        )
-    ''')
-    conn.commit()
     return conn, cursor
 
 def show_header():
@@ -3,104 +3,217 @@ Game Statistics Logger
 Logs all battle statistics to database for web display
 """
 
+import atexit
 import json
+import queue
 import sqlite3
+import threading
 from datetime import datetime
 import os
 
+import stats_db
+
+WRITE_BATCH = 512  # Statements gathered into one transaction (a group is never split)
+DAMAGE_BATCH = 2048  # Hits buffered before they are handed to the writer
+
+DAMAGE_INSERT = '''
+    INSERT INTO damage_log (game_id, attacker, victim, damage, critical, tick)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+class StatsWriter:
+    """
+    Background thread that owns its own connection and writes queued
+    statements in batched transactions, so match events never wait on disk.
+    """
+
+    def __init__(self, db_path=stats_db.DB_PATH):
+        self.db_path = db_path
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name='stats-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, sql, params):
+        self.submit_group([(sql, params)])
+
+    def submit_group(self, statements):
+        """Queue [(sql, params), ...] to be committed in the same transaction"""
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("StatsWriter is closed")
+            self.queue.put(list(statements))
+
+    def flush(self):
+        """Block until everything submitted so far is committed"""
+        if self.closed:
+            return  # close() already waited for the last write
+        self.queue.join()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        conn = stats_db.connect(self.db_path)
+        running = True
+        while running:
+            groups = [self.queue.get()]
+            size = len(groups[0] or ())
+            while size < WRITE_BATCH:
+                try:
+                    group = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                groups.append(group)
+                size += len(group or ())
+
+            if None in groups:
+                running = False
+
+            try:
+                self.commit(conn, [group for group in groups if group])
+            finally:
+                for _ in groups:
+                    self.queue.task_done()
+        conn.close()
+
+    def commit(self, conn, groups):
+        """
+        Write the groups in one transaction. If that fails it is rolled back
+        and every group is retried on its own, so a bad statement only loses
+        its own group - never the end_game of a match queued next to it.
+        """
+        try:
+            with conn:
+                self.write(conn, [statement for group in groups for statement in group])
+            return
+        except sqlite3.Error as e:
+            if len(groups) == 1:
+                print(f"❌ Erro ao salvar estatísticas: {e}")
+                return
+
+        for group in groups:
+            try:
+                with conn:
+                    self.write(conn, group)
+            except sqlite3.Error as e:
+                print(f"❌ Erro ao salvar estatísticas: {e}")
+
+    @staticmethod
+    def write(conn, batch):
+        """Runs of the same statement go through one executemany, in submit order"""
+        start = 0
+        while start < len(batch):
+            sql = batch[start][0]
+            end = start + 1
+            while end < len(batch) and batch[end][0] == sql:
+                end += 1
+            conn.executemany(sql, [params for _, params in batch[start:end]])
+            start = end
+
+def collect_stats(cursor):
+    """Rankings and recent games as shown on the site"""
+    # Get overall rankings (kept up to date by end_game)
+    cursor.execute('''
+        SELECT 
+            username,
+            games,
+            wins,
+            kills,
+            damage,
+            CAST(position_sum AS REAL) / NULLIF(placed_games, 0) as avg_position
+        FROM player_totals
+        ORDER BY wins DESC, kills DESC
+        LIMIT 50
+    ''')
+
+    rankings = []
+    for row in cursor.fetchall():
+        rankings.append({
+            'username': row[0],
+            'games': row[1],
+            'wins': row[2],
+            'kills': row[3],
+            'damage': row[4],
+            'avg_position': round(row[5], 1) if row[5] else 0
+        })
+
+    # Get recent games
+    cursor.execute('''
+        SELECT id, winner, total_players, duration_seconds, ended_at
+        FROM games
+        WHERE ended_at IS NOT NULL
+        ORDER BY id DESC
+        LIMIT 10
+    ''')
+
+    recent_games = []
+    for row in cursor.fetchall():
+        game_id = row[0]
+
+        # Get top damage dealer for this game
+        cursor.execute('''
+            SELECT attacker, SUM(damage) as total_damage
+            FROM damage_log
+            WHERE game_id = ?
+            GROUP BY attacker
+            ORDER BY total_damage DESC
+            LIMIT 1
+        ''', (game_id,))
+
+        top_damage_result = cursor.fetchone()
+        top_damage_player = top_damage_result[0] if top_damage_result else None
+        top_damage_amount = top_damage_result[1] if top_damage_result else 0
+
+        recent_games.append({
+            'id': game_id,
+            'winner': row[1],
+            'players': row[2],
+            'duration': row[3],
+            'date': row[4],
+            'top_damage': {
+                'player': top_damage_player,
+                'amount': top_damage_amount
+            }
+        })
+
+    return {
+        'rankings': rankings,
+        'recent_games': recent_games
+    }
+
 class GameLogger:
     def __init__(self):
         self.init_database()
         self.current_game_id = None
         self.game_stats = {}
+        self.damage_buffer = []
+        self.writer = StatsWriter()
+        atexit.register(self.close)
         
     def init_database(self):
-        """Initialize SQLite database for game statistics"""
-        self.conn = sqlite3.connect('game_stats.db')
+        """Open the statistics database (tables are created by stats_db migrations)"""
+        # The web server calls create_payment from its worker threads,
+        # one at a time (web_server.payment_lock)
+        self.conn = stats_db.connect(check_same_thread=False)
         self.cursor = self.conn.cursor()
-        
-        # Games table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS games (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                started_at TIMESTAMP,
-                ended_at TIMESTAMP,
-                total_players INTEGER,
-                winner TEXT,
-                duration_seconds REAL
-            )
-        ''')
-        
-        # Player stats table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS player_stats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                game_id INTEGER,
-                username TEXT,
-                kills INTEGER DEFAULT 0,
-                damage_dealt INTEGER DEFAULT 0,
-                damage_taken INTEGER DEFAULT 0,
-                survived_seconds REAL DEFAULT 0,
-                final_position INTEGER,
-                hp_start INTEGER,
-                strength INTEGER DEFAULT 5,
-                armor INTEGER DEFAULT 0,
-                luck INTEGER DEFAULT 0,
-                FOREIGN KEY (game_id) REFERENCES games(id)
-            )
-        ''')
-        
-        # Kills log table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS kill_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                game_id INTEGER,
-                killer TEXT,
-                victim TEXT,
-                damage INTEGER,
-                timestamp TIMESTAMP,
-                FOREIGN KEY (game_id) REFERENCES games(id)
-            )
-        ''')
-        
-        # Player attributes table (for paid upgrades)
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS player_attributes (
-                username TEXT PRIMARY KEY,
-                bonus_hp INTEGER DEFAULT 0,
-                bonus_strength INTEGER DEFAULT 0,
-                bonus_armor INTEGER DEFAULT 0,
-                bonus_luck INTEGER DEFAULT 0,
-                total_spent REAL DEFAULT 0,
-                last_payment TIMESTAMP
-            )
-        ''')
-        
-        # Payment queue table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS payment_queue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT,
-                attribute_type TEXT,
-                amount INTEGER,
-                price REAL,
-                pix_code TEXT,
-                status TEXT DEFAULT 'pending',
-                created_at TIMESTAMP,
-                confirmed_at TIMESTAMP
-            )
-        ''')
-        
-        self.conn.commit()
     
-    def start_game(self, players):
-        """Start logging a new game"""
+    def start_game(self, players, seed=None):
+        """Start logging a new game (seed replays it via main.game_loop)"""
+        self.writer.flush()  # Previous match fully written before this one starts
         self.cursor.execute('''
-            INSERT INTO games (started_at, total_players)
-            VALUES (?, ?)
-        ''', (datetime.now(), len(players)))
+            INSERT INTO games (started_at, total_players, seed)
+            VALUES (?, ?, ?)
+        ''', (datetime.now(), len(players), seed))
         
         self.current_game_id = self.cursor.lastrowid
+        self.damage_buffer = []
         self.game_stats = {
             'start_time': datetime.now(),
             'players': {},
@@ -108,15 +221,12 @@ class GameLogger:
         }
         
         # Initialize player stats
+        rows = []
         for player in players:
             username = player.get('instagram_username', 'Unknown')
             stats = player.get('stats', {})
             
-            self.cursor.execute('''
-                INSERT INTO player_stats 
-                (game_id, username, hp_start, strength, armor, luck)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
+            rows.append((
                 self.current_game_id,
                 username,
                 stats.get('hp', 100),
@@ -129,14 +239,20 @@ class GameLogger:
                 'kills': 0,
                 'damage_dealt': 0,
                 'damage_taken': 0,
-                'alive': True
+                'alive': True,
+                'position': None
             }
         
+        self.cursor.executemany('''
+            INSERT INTO player_stats 
+            (game_id, username, hp_start, strength, armor, luck)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
         self.conn.commit()
         return self.current_game_id
     
-    def log_damage(self, attacker, victim, damage):
-        """Log damage dealt"""
+    def log_damage(self, attacker, victim, damage, critical=False, tick=None):
+        """Log damage dealt (tick: simulation tick of the hit)"""
         if not self.current_game_id:
             return
             
@@ -145,14 +261,22 @@ class GameLogger:
             self.game_stats['players'][attacker]['damage_dealt'] += damage
         if victim in self.game_stats['players']:
             self.game_stats['players'][victim]['damage_taken'] += damage
+        
+        # Hits are written in bulk, never one by one
+        self.damage_buffer.append((DAMAGE_INSERT, (
+            self.current_game_id, attacker, victim, damage, int(critical), tick
+        )))
+        if len(self.damage_buffer) >= DAMAGE_BATCH:
+            self.writer.submit_group(self.damage_buffer)
+            self.damage_buffer = []
     
     def log_kill(self, killer, victim):
         """Log a kill"""
         if not self.current_game_id:
             return
             
-        # Log the kill
-        self.cursor.execute('''
+        # Log the kill (written by the stats thread)
+        self.writer.submit('''
             INSERT INTO kill_log (game_id, killer, victim, timestamp)
             VALUES (?, ?, ?, ?)
         ''', (self.current_game_id, killer, victim, datetime.now()))
@@ -165,41 +289,52 @@ class GameLogger:
         if victim in self.game_stats['players']:
             self.game_stats['players'][victim]['alive'] = False
             self.game_stats['alive_count'] -= 1
+            position = self.game_stats['alive_count'] + 1
+            self.game_stats['players'][victim]['position'] = position
             
             # Update final position
-            self.cursor.execute('''
+            self.writer.submit('''
                 UPDATE player_stats 
                 SET final_position = ?
                 WHERE game_id = ? AND username = ?
-            ''', (self.game_stats['alive_count'] + 1, self.current_game_id, victim))
-        
-        self.conn.commit()
+            ''', (position, self.current_game_id, victim))
     
-    def end_game(self, winner):
-        """End the game and finalize stats"""
+    def end_game(self, winner, duration_seconds=None):
+        """End the game and finalize stats (duration_seconds: simulated match time)"""
         if not self.current_game_id:
             return
             
         end_time = datetime.now()
-        duration = (end_time - self.game_stats['start_time']).total_seconds()
+        if duration_seconds is not None:
+            duration = duration_seconds
+        else:
+            duration = (end_time - self.game_stats['start_time']).total_seconds()
+        
+        if winner in self.game_stats['players']:
+            self.game_stats['players'][winner]['position'] = 1
+        
+        # Everything below is committed together, so player_totals
+        # can never disagree with player_stats
+        statements = self.damage_buffer
+        self.damage_buffer = []
         
         # Update game record
-        self.cursor.execute('''
+        statements.append(('''
             UPDATE games 
             SET ended_at = ?, winner = ?, duration_seconds = ?
             WHERE id = ?
-        ''', (end_time, winner, duration, self.current_game_id))
+        ''', (end_time, winner, duration, self.current_game_id)))
         
         # Update winner position
-        self.cursor.execute('''
+        statements.append(('''
             UPDATE player_stats 
             SET final_position = 1
             WHERE game_id = ? AND username = ?
-        ''', (self.current_game_id, winner))
+        ''', (self.current_game_id, winner)))
         
         # Update all player stats
         for username, stats in self.game_stats['players'].items():
-            self.cursor.execute('''
+            statements.append(('''
                 UPDATE player_stats 
                 SET kills = ?, damage_dealt = ?, damage_taken = ?
                 WHERE game_id = ? AND username = ?
@@ -209,9 +344,35 @@ class GameLogger:
                 stats['damage_taken'],
                 self.current_game_id,
                 username
-            ))
+            )))
         
-        self.conn.commit()
+        # Add this match to the leaderboard totals
+        for username, stats in self.game_stats['players'].items():
+            position = stats['position']
+            statements.append(('''
+                INSERT INTO player_totals
+                (username, games, wins, kills, damage, position_sum, placed_games)
+                VALUES (?, 1, ?, ?, ?, ?, ?)
+                ON CONFLICT(username) DO UPDATE SET
+                games = games + 1,
+                wins = wins + excluded.wins,
+                kills = kills + excluded.kills,
+                damage = damage + excluded.damage,
+                position_sum = position_sum + excluded.position_sum,
+                placed_games = placed_games + excluded.placed_games
+            ''', (
+                username,
+                1 if position == 1 else 0,
+                stats['kills'],
+                stats['damage_dealt'],
+                position or 0,
+                1 if position else 0
+            )))
+        
+        self.writer.submit_group(statements)
+        
+        # The export below reads what was just queued
+        self.writer.flush()
         
         # Export to JSON for web
         self.export_to_json()
@@ -222,76 +383,13 @@ class GameLogger:
     
     def export_to_json(self):
         """Export current stats to JSON for web display"""
-        # Get overall rankings
-        self.cursor.execute('''
-            SELECT 
-                username,
-                COUNT(*) as games_played,
-                SUM(CASE WHEN final_position = 1 THEN 1 ELSE 0 END) as wins,
-                SUM(kills) as total_kills,
-                SUM(damage_dealt) as total_damage,
-                AVG(final_position) as avg_position
-            FROM player_stats
-            GROUP BY username
-            ORDER BY wins DESC, total_kills DESC
-            LIMIT 50
-        ''')
-        
-        rankings = []
-        for row in self.cursor.fetchall():
-            rankings.append({
-                'username': row[0],
-                'games': row[1],
-                'wins': row[2],
-                'kills': row[3],
-                'damage': row[4],
-                'avg_position': round(row[5], 1) if row[5] else 0
-            })
-        
-        # Get recent games
-        self.cursor.execute('''
-            SELECT id, winner, total_players, duration_seconds, ended_at
-            FROM games
-            WHERE ended_at IS NOT NULL
-            ORDER BY id DESC
-            LIMIT 10
-        ''')
-        
-        recent_games = []
-        for row in self.cursor.fetchall():
-            game_id = row[0]
-            
-            # Get top damage dealer for this game
-            self.cursor.execute('''
-                SELECT attacker, SUM(damage) as total_damage
-                FROM damage_log
-                WHERE game_id = ?
-                GROUP BY attacker
-                ORDER BY total_damage DESC
-                LIMIT 1
-            ''', (game_id,))
-            
-            top_damage_result = self.cursor.fetchone()
-            top_damage_player = top_damage_result[0] if top_damage_result else None
-            top_damage_amount = top_damage_result[1] if top_damage_result else 0
-            
-            recent_games.append({
-                'id': game_id,
-                'winner': row[1],
-                'players': row[2],
-                'duration': row[3],
-                'date': row[4],
-                'top_damage': {
-                    'player': top_damage_player,
-                    'amount': top_damage_amount
-                }
-            })
+        stats = collect_stats(self.cursor)
         
         # Export to JSON
         export_data = {
             'last_updated': datetime.now().isoformat(),
-            'rankings': rankings,
-            'recent_games': recent_games
+            'rankings': stats['rankings'],
+            'recent_games': stats['recent_games']
         }
         
         with open('web/game_stats.json', 'w') as f:
@@ -385,5 +483,9 @@ class GameLogger:
         self.conn.commit()
         return True
 
+    def close(self):
+        """Write out queued statistics and stop the stats thread"""
+        self.writer.close()
+
 # Singleton instance
 game_logger = GameLogger()
\ No newline at end of file
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Load Test for the Rankings Site
+Hammers a running web_server.py from several client threads and reports
+requests per second and latency percentiles.
+
+Slow clients open a connection, send half a request and go quiet - with
+the old one-request-at-a-time server a single one stalls everybody else.
+Idle clients make one keep-alive request and then sit on the connection,
+like browser tabs left open; enough of them must not lock new visitors out.
+
+Usage:
+    python web_server.py &
+    python load_test.py --concurrency 16 --duration 10 --slow-clients 2
+    python load_test.py --concurrency 8 --duration 10 --idle-clients 32
+"""
+
+import argparse
+import http.client
+import socket
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def client_worker(host, port, paths, deadline, keep_alive, timeout, results):
+    """Request `paths` round-robin until the deadline, appending latencies (None = error)"""
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    headers = {'Accept-Encoding': 'gzip'}
+    if not keep_alive:
+        headers['Connection'] = 'close'
+
+    latencies = []
+    errors = 0
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+            if not keep_alive:
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()  # Reconnects on the next request
+    conn.close()
+    results.append((latencies, errors))
+
+
+def open_slow_client(host, port):
+    """A connection that sends the start of a request and nothing more"""
+    sock = socket.create_connection((host, port))
+    sock.sendall(b'GET /api/stats HTTP/1.1\r\nHost: ' + host.encode() + b'\r\n')
+    return sock
+
+
+def open_idle_client(host, port):
+    """A keep-alive connection that makes one request and then goes quiet"""
+    sock = socket.create_connection((host, port))
+    sock.sendall(b'GET /api/stats HTTP/1.1\r\nHost: ' + host.encode() + b'\r\n\r\n')
+    return sock
+
+
+def closed_by_server(sock):
+    """True if the server has hung up on a connection (the response is skipped)"""
+    sock.setblocking(False)
+    try:
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                return True
+    except BlockingIOError:
+        return False
+    except OSError:
+        return True
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_load(url, paths, concurrency, duration, keep_alive=True, slow_clients=0,
+             idle_clients=0, timeout=30):
+    """Run the test and return a summary dict"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    slow = [open_slow_client(host, port) for _ in range(slow_clients)]
+    idle = [open_idle_client(host, port) for _ in range(idle_clients)]
+    try:
+        results = []
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=client_worker,
+                             args=(host, port, paths, deadline, keep_alive, timeout, results))
+            for _ in range(concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        idle_closed = sum(1 for sock in idle if closed_by_server(sock))
+    finally:
+        for sock in slow + idle:
+            sock.close()
+
+    latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        'idle_closed': idle_closed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the rankings web server")
+    parser.add_argument('--url', default='http://localhost:8080', help="server base URL")
+    parser.add_argument('--paths', default='/api/stats,/index.html', help="comma-separated paths to request")
+    parser.add_argument('--concurrency', type=int, default=16, help="client threads")
+    parser.add_argument('--duration', type=float, default=10, help="seconds to run")
+    parser.add_argument('--no-keep-alive', action='store_true', help="open a new connection per request")
+    parser.add_argument('--slow-clients', type=int, default=0, help="idle half-sent requests held open during the test")
+    parser.add_argument('--idle-clients', type=int, default=0,
+                        help="keep-alive connections left idle after one request during the test")
+    parser.add_argument('--timeout', type=float, default=30, help="client socket timeout in seconds")
+    args = parser.parse_args()
+
+    paths = [path.strip() for path in args.paths.split(',') if path.strip()]
+    summary = run_load(args.url, paths, args.concurrency, args.duration,
+                       keep_alive=not args.no_keep_alive, slow_clients=args.slow_clients,
+                       idle_clients=args.idle_clients, timeout=args.timeout)
+
+    print(f"🌐 {args.url} - {args.concurrency} clientes, {args.slow_clients} lentos, "
+          f"{args.idle_clients} ociosos, keep-alive {'não' if args.no_keep_alive else 'sim'}")
+    print(f"📈 {summary['requests']} requisições em {summary['seconds']:.1f}s "
+          f"({summary['rps']:.0f} req/s), {summary['errors']} erros")
+    print(f"⏱️  média {summary['mean_ms']:.1f} ms | p50 {summary['p50_ms']:.1f} ms | "
+          f"p95 {summary['p95_ms']:.1f} ms | p99 {summary['p99_ms']:.1f} ms | máx {summary['max_ms']:.0f} ms")
+    if args.idle_clients:
+        print(f"💤 {summary['idle_closed']}/{args.idle_clients} conexões ociosas fechadas pelo servidor")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,15 @@
 import pygame
 import json
 import random
-import os
 import math
 from game_logger import game_logger
-
-# --- Constants ---
-SCREEN_WIDTH = 1280
-SCREEN_HEIGHT = 720
-FPS = 60
-SPRITE_SIZE = 40
-INITIAL_SIZE = 40
-SIZE_INCREMENT = 1  # Pixels to grow per death (very gradual)
-MAX_SIZE = 80  # Maximum size before speed boost kicks in (reduced)
-SPEED_INCREMENT = 0.02  # Speed multiplier increment after max size
+from render_cache import avatar_cache, text_cache, icon_cache, DEFAULT_AVATAR_PATH
+from avatar_atlas import load_avatar_atlas
+from roster_cache import load_roster
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, FPS, INITIAL_SIZE, MAX_SIZE,
+    Fighter, BattleSimulation, MatchRandom
+)
 
 # --- Colors ---
 BLACK = (0, 0, 0)
@@ -22,401 +18,130 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 GOLD = (255, 215, 0)
 YELLOW = (255, 255, 0)
+BAR_COLORKEY = (255, 0, 255)  # Transparent parts of cached health bars
+
+SCREEN_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+# The simulation advances in fixed ticks, independent of the display
+RENDER_FPS = 60  # Frame cap
+TICK_RATE = FPS  # Simulation ticks per real second (raise to fast-forward)
+MAX_TICKS_PER_FRAME = 5  # Under load, skip up to this many frames' rendering, then slow down
+
+# At or below this many survivors, only the changed screen areas are
+# cleared and sent to the display instead of full frames (0 disables)
+DIRTY_RECT_SURVIVORS = 50
 
-# --- The Combatant Class ---
-# This class represents each follower in the battle.
+# --- The Combatant Sprite ---
+# This class draws a follower in the battle. All physics and combat state
+# lives in its Fighter (see simulation.py) - the sprite only renders it.
 class Follower(pygame.sprite.Sprite):
-    def __init__(self, user_data):
+    def __init__(self, user_data, rng=None, attributes=None):
         # Call the parent class (Sprite) constructor
         super().__init__()
 
         self.username = user_data.get("instagram_username", "Unknown")
-        self.current_size = INITIAL_SIZE
-        self.speed_multiplier = 1.0
+        self.image_size = INITIAL_SIZE
         
-        # Store the original image for resizing
+        # Store the original image for resizing - decoded surfaces are shared
+        # through avatar_cache, keyed by path (or fallback color)
         self.original_image = None
+        self.avatar_key = None
         
         # --- Robust Image Loading with Circular Mask ---
         try:
             # The blueprint specifies loading the user's profile picture from a local path
             profile_path = user_data["profile_pic_path"]
-            temp_image = pygame.image.load(profile_path).convert_alpha()
-            self.original_image = temp_image  # Keep original for resizing
+            self.original_image = avatar_cache.load(profile_path)
+            self.avatar_key = profile_path
             self.update_image_size()
             
         except (pygame.error, FileNotFoundError):
-            # Use default avatar for users without photos
+            # Use default avatar for users without photos - one surface for all of them
             try:
-                default_avatar_path = "profiles/default_avatar.png"
-                temp_image = pygame.image.load(default_avatar_path).convert_alpha()
-                self.original_image = temp_image
+                self.original_image = avatar_cache.load(DEFAULT_AVATAR_PATH)
+                self.avatar_key = DEFAULT_AVATAR_PATH
                 self.update_image_size()
                 print(f"Using default avatar for {self.username}")
             except:
                 # Final fallback if default avatar doesn't exist
                 print(f"Warning: Could not load image for {self.username}. Using a fallback color.")
-                random.seed(self.username)
-                self.fallback_color = (random.randint(50, 255), random.randint(50, 255), random.randint(50, 255))
+                # Own RNG so the color is stable per user without touching the match streams
+                color_rng = random.Random(self.username)
+                self.fallback_color = (color_rng.randint(50, 255), color_rng.randint(50, 255), color_rng.randint(50, 255))
                 self.original_image = None
+                self.avatar_key = self.fallback_color
                 self.update_image_size()
 
-        # Create the rect for positioning and collision
-        self.rect = self.image.get_rect()
-        self.radius = self.current_size // 2  # For circular collision
+        # Cached health bar surface and the (hp, max_hp, size) it shows
+        self.health_bar = None
+        self.health_bar_key = None
+
+        # Physics and combat state
+        self.fighter = Fighter(user_data, rng, attributes)
+        self.remember_position()
+        self.sync()
 
-        # Physics properties using floating-point vectors for smooth movement
-        self.pos = pygame.math.Vector2(
-            random.randint(SPRITE_SIZE, SCREEN_WIDTH - SPRITE_SIZE),
-            random.randint(SPRITE_SIZE, SCREEN_HEIGHT - SPRITE_SIZE)
-        )
-        
-        # Random initial velocity
-        angle = random.uniform(0, 2 * math.pi)
-        speed = random.uniform(2, 4)  # Increased base speed
-        self.velocity = pygame.math.Vector2(
-            speed * math.cos(angle),
-            speed * math.sin(angle)
-        )
-
-        self.rect.center = self.pos
-
-        # Combat attributes - Check JSON file for bonuses
-        bonuses = {'hp': 0, 'forca': 0, 'armadura': 0, 'sorte': 0}
-        try:
-            with open('atributos.json', 'r') as f:
-                all_attributes = json.load(f)
-                if self.username in all_attributes:
-                    bonuses = all_attributes[self.username]
-        except:
-            pass  # Use default values if file doesn't exist
-        
-        # Base values
-        base_hp = 100
-        base_damage = 5
-        
-        # Each attribute point = 1% bonus
-        hp_bonus = bonuses.get('hp', 0)
-        damage_bonus = bonuses.get('forca', 0)
-        armor_bonus = bonuses.get('armadura', 0)
-        luck_bonus = bonuses.get('sorte', 0)
-        
-        # Apply percentage bonuses
-        self.hp = int(base_hp * (1 + hp_bonus / 100))  # +1% per point
-        self.max_hp = self.hp
-        self.damage = base_damage * (1 + damage_bonus / 100)  # +1% per point
-        
-        # Armor reduces incoming damage by percentage (max 50% reduction)
-        self.armor_reduction = min(0.5, armor_bonus / 100)  # 1% reduction per point, max 50%
-        
-        # Luck is chance for critical hit (max 50% chance)
-        self.luck = min(0.5, luck_bonus / 100)  # 1% crit chance per point, max 50%
-        
         # Show balanced stats
-        if hp_bonus > 0 or damage_bonus > 0 or armor_bonus > 0 or luck_bonus > 0:
-            print(f"{self.username}: HP={self.hp} (+{hp_bonus}%), DMG={self.damage:.1f} (+{damage_bonus}%), ARM={self.armor_reduction*100:.0f}%, LUCK={self.luck*100:.0f}%")
+        fighter = self.fighter
+        if fighter.has_bonuses:
+            print(f"{self.username}: HP={fighter.hp} (+{fighter.hp_bonus}%), DMG={fighter.damage:.1f} (+{fighter.damage_bonus}%), ARM={fighter.armor_reduction*100:.0f}%, LUCK={fighter.luck*100:.0f}%")
+
+    # Read-only views of the fighter state used by the drawing code
+    @property
+    def hp(self):
+        return self.fighter.hp
+
+    @property
+    def max_hp(self):
+        return self.fighter.max_hp
+
+    @property
+    def damage(self):
+        return self.fighter.damage
+
+    @property
+    def armor_reduction(self):
+        return self.fighter.armor_reduction
+
+    @property
+    def luck(self):
+        return self.fighter.luck
+
+    @property
+    def current_size(self):
+        return self.fighter.current_size
 
-        # Cooldown to prevent instant multiple hits
-        self.last_hit_time = 0
-        self.hit_cooldown = 500  # milliseconds
-    
     def update_image_size(self):
         """Update the sprite image based on current size"""
-        radius = self.current_size // 2
-        
-        if self.original_image:
-            # Scale the original image to new size
-            temp_image = pygame.transform.scale(self.original_image, (self.current_size, self.current_size))
-            
-            # Create circular mask
-            self.image = pygame.Surface((self.current_size, self.current_size), pygame.SRCALPHA)
-            self.image.fill((0, 0, 0, 0))  # Transparent background
-            
-            # Draw circular mask
-            pygame.draw.circle(self.image, (255, 255, 255, 255), (radius, radius), radius)
-            self.image.blit(temp_image, (0, 0), special_flags=pygame.BLEND_RGBA_MIN)
-            
-            # NO BORDER - removed the white border line
-        else:
-            # Fallback colored circle
-            self.image = pygame.Surface((self.current_size, self.current_size), pygame.SRCALPHA)
-            self.image.fill((0, 0, 0, 0))  # Transparent background
-            
-            # Draw colored circle without border
-            pygame.draw.circle(self.image, self.fallback_color, (radius, radius), radius)
+        # Masked and scaled once per (avatar, size), shared by every sprite
+        self.image = avatar_cache.masked_avatar(self.avatar_key, self.image_size)
         
-        # Update rect and radius
+        # Update rect
         old_center = self.rect.center if hasattr(self, 'rect') else (0, 0)
         self.rect = self.image.get_rect(center=old_center)
-        self.radius = radius
-    
-    def update_size_and_speed(self, total_deaths):
-        """Update size based on deaths, then speed if at max size"""
-        # Logarithmic growth for smoother progression
-        if total_deaths == 0:
-            self.current_size = INITIAL_SIZE
-        else:
-            # Use logarithmic scale for smoother growth
-            growth_factor = math.log(total_deaths + 1) * 8  # Adjust multiplier for desired growth rate
-            new_size = INITIAL_SIZE + growth_factor
-            
-            if new_size <= MAX_SIZE:
-                # Still growing in size
-                self.current_size = int(new_size)
-                self.update_image_size()
-            else:
-                # Max size reached, increase speed instead
-                self.current_size = MAX_SIZE
-                self.update_image_size()
-                
-                # Calculate extra deaths beyond size limit
-                extra_deaths = total_deaths - 30  # Approximate deaths to reach max size
-                if extra_deaths > 0:
-                    self.speed_multiplier = 1.0 + (extra_deaths * SPEED_INCREMENT)
-                    
-                    # Cap speed multiplier
-                    if self.speed_multiplier > 3.0:
-                        self.speed_multiplier = 3.0
-
-    def update(self):
-        # --- Simple Movement and Physics with speed multiplier ---
-        actual_velocity = self.velocity * self.speed_multiplier
-        self.pos += actual_velocity
-        self.rect.center = self.pos
-
-        # Wall collision detection - perfect elastic collision
-        hit_wall = False
-        if self.rect.left <= 0 or self.rect.right >= SCREEN_WIDTH:
-            self.velocity.x = -self.velocity.x
-            hit_wall = True
-            # Keep sprite in bounds
-            if self.rect.left <= 0:
-                self.rect.left = 0
-            else:
-                self.rect.right = SCREEN_WIDTH
-            self.pos.x = self.rect.centerx
-            
-        if self.rect.top <= 0 or self.rect.bottom >= SCREEN_HEIGHT:
-            self.velocity.y = -self.velocity.y
-            hit_wall = True
-            # Keep sprite in bounds
-            if self.rect.top <= 0:
-                self.rect.top = 0
-            else:
-                self.rect.bottom = SCREEN_HEIGHT
-            self.pos.y = self.rect.centery
-        
-        # Speed boost on wall hit after max size
-        if hit_wall and self.current_size >= MAX_SIZE:
-            self.speed_multiplier *= 1.01
-            if self.speed_multiplier > 3.0:
-                self.speed_multiplier = 3.0
-        
-        # Keep minimum speed to prevent stopping
-        if self.velocity.length() < 2.0:  # Increased minimum
-            # If too slow, give it a stronger push
-            angle = random.uniform(0, 2 * math.pi)
-            speed = 3.0  # Good base speed
-            self.velocity = pygame.math.Vector2(
-                speed * math.cos(angle),
-                speed * math.sin(angle)
-            )
-        
-        # Cap maximum velocity (before multiplier) - increased for better gameplay
-        if self.velocity.length() > 10:
-            self.velocity.scale_to_length(10)
-
-    def collide_with(self, other_sprite):
-        """Handle collision with another sprite"""
-        # Calculate distance between centers
-        distance = self.pos.distance_to(other_sprite.pos)
-        
-        # Check if actually colliding (circles touching)
-        if distance < (self.radius + other_sprite.radius) and distance > 0:
-            # Perfect elastic collision for circles
-            # Calculate collision normal
-            normal = (other_sprite.pos - self.pos).normalize()
-            
-            # Relative velocity
-            relative_velocity = self.velocity - other_sprite.velocity
-            
-            # Speed along collision normal
-            speed = relative_velocity.dot(normal)
-            
-            # Do not resolve if velocities are separating
-            if speed < 0:
-                return
-            
-            # Calculate new velocities (elastic collision)
-            self.velocity -= normal * speed
-            other_sprite.velocity += normal * speed
-            
-            # Ensure minimum speed after collision (higher minimum for endgame)
-            min_speed = 3.0 if hasattr(self, 'current_size') and self.current_size > MAX_SIZE else 2.0
-            if self.velocity.length() < min_speed:
-                self.velocity.scale_to_length(min_speed)
-            if other_sprite.velocity.length() < min_speed:
-                other_sprite.velocity.scale_to_length(min_speed)
-            
-            # Speed boost on collision after max size
-            if self.current_size >= MAX_SIZE:
-                self.speed_multiplier *= 1.005
-                if self.speed_multiplier > 3.0:
-                    self.speed_multiplier = 3.0
-            
-            # Separate circles to prevent overlap
-            overlap = (self.radius + other_sprite.radius) - distance
-            separation = normal * (overlap / 2 + 1)
-            self.pos -= separation
-            other_sprite.pos += separation
-            
-            # Update rect positions
-            self.rect.center = self.pos
-            other_sprite.rect.center = other_sprite.pos
-
-    def deal_damage(self, other_sprite, is_final_two=False):
-        """Deal damage during collision - returns True if target dies"""
-        now = pygame.time.get_ticks()
-        if now - self.last_hit_time > self.hit_cooldown:
-            self.last_hit_time = now
-            
-            # Start with calculated damage
-            damage = self.damage
-            
-            # Apply luck for critical hits (based on new percentage system)
-            if self.luck > 0 and random.random() < self.luck:
-                damage = damage * 2
-                print(f"CRITICAL HIT by {self.username}!")
-            
-            # Apply armor reduction (percentage-based, not flat reduction)
-            if hasattr(other_sprite, 'armor_reduction') and other_sprite.armor_reduction > 0:
-                damage = damage * (1 - other_sprite.armor_reduction)
-            
-            # Ensure minimum damage of 1
-            damage = max(1, damage)
-            
-            # ANTI-DRAW SYSTEM: In final 2, ensure no draws
-            if is_final_two:
-                # If both would die from normal damage, the one with more HP wins
-                if self.hp <= damage and other_sprite.hp <= damage:
-                    # Prevent double death - higher HP survives
-                    if self.hp > other_sprite.hp:
-                        # I have more HP, kill the other
-                        damage = other_sprite.hp + 1
-                    else:
-                        # Other has more HP, don't kill them but deal some damage
-                        damage = max(1, min(damage, other_sprite.hp - 1))
-                elif other_sprite.hp <= damage:
-                    # Ensure they die
-                    damage = other_sprite.hp + 1
-            
-            # Apply damage
-            other_sprite.hp -= damage
-            print(f"{self.username} hits {other_sprite.username} for {damage} damage. {other_sprite.username} HP: {other_sprite.hp}")
-            
-            # Log damage to database
-            game_logger.log_damage(self.username, other_sprite.username, damage)
-
-            # Elimination check
-            if other_sprite.hp <= 0:
-                print(f"--- {other_sprite.username} has been eliminated by {self.username}! ---")
-                # Log kill to database
-                game_logger.log_kill(self.username, other_sprite.username)
-                return True  # Signal that someone died
-        return False
-
-    def draw_pixelated_heart(self, surface, x, y, size):
-        """Draw a pixelated heart"""
-        pixel_size = max(1, size // 8)
-        heart_pattern = [
-            [0,1,1,0,0,1,1,0],
-            [1,1,1,1,1,1,1,1],
-            [1,1,1,1,1,1,1,1],
-            [1,1,1,1,1,1,1,1],
-            [0,1,1,1,1,1,1,0],
-            [0,0,1,1,1,1,0,0],
-            [0,0,0,1,1,0,0,0],
-            [0,0,0,0,0,0,0,0]
-        ]
-        for row in range(8):
-            for col in range(8):
-                if heart_pattern[row][col]:
-                    px = x - (size//2) + col * pixel_size
-                    py = y - (size//2) + row * pixel_size
-                    pygame.draw.rect(surface, (255, 80, 120), (px, py, pixel_size, pixel_size))
-    
-    def draw_pixelated_sword(self, surface, x, y, size):
-        """Draw a pixelated sword"""
-        pixel_size = max(1, size // 8)
-        sword_pattern = [
-            [0,0,0,0,0,0,1,0],
-            [0,0,0,0,0,1,1,1],
-            [0,0,0,0,1,1,1,0],
-            [0,0,0,1,1,1,0,0],
-            [0,0,1,1,1,0,0,0],
-            [0,1,1,1,0,0,0,0],
-            [1,1,1,0,0,0,0,0],
-            [1,1,0,0,0,0,0,0]
-        ]
-        for row in range(8):
-            for col in range(8):
-                if sword_pattern[row][col]:
-                    px = x - (size//2) + col * pixel_size
-                    py = y - (size//2) + row * pixel_size
-                    if row < 2 or col < 2:  # Handle
-                        pygame.draw.rect(surface, (139, 69, 19), (px, py, pixel_size, pixel_size))
-                    else:  # Blade
-                        pygame.draw.rect(surface, (192, 192, 192), (px, py, pixel_size, pixel_size))
-    
-    def draw_pixelated_shield(self, surface, x, y, size):
-        """Draw a pixelated shield"""
-        pixel_size = max(1, size // 8)
-        shield_pattern = [
-            [0,1,1,1,1,1,1,0],
-            [1,1,1,1,1,1,1,1],
-            [1,1,1,1,1,1,1,1],
-            [1,1,1,1,1,1,1,1],
-            [1,1,1,1,1,1,1,1],
-            [0,1,1,1,1,1,1,0],
-            [0,0,1,1,1,1,0,0],
-            [0,0,0,1,1,0,0,0]
-        ]
-        for row in range(8):
-            for col in range(8):
-                if shield_pattern[row][col]:
-                    px = x - (size//2) + col * pixel_size
-                    py = y - (size//2) + row * pixel_size
-                    # Blue shield with silver trim
-                    if (row == 0 or row == 7 or col == 0 or col == 7) and shield_pattern[row][col]:
-                        pygame.draw.rect(surface, (192, 192, 192), (px, py, pixel_size, pixel_size))
-                    else:
-                        pygame.draw.rect(surface, (64, 128, 255), (px, py, pixel_size, pixel_size))
-    
-    def draw_pixelated_clover(self, surface, x, y, size):
-        """Draw a pixelated four-leaf clover"""
-        pixel_size = max(1, size // 8)
-        clover_pattern = [
-            [0,1,1,0,0,1,1,0],
-            [1,1,1,1,1,1,1,1],
-            [1,1,1,1,1,1,1,1],
-            [0,1,1,1,1,1,1,0],
-            [0,0,0,1,1,0,0,0],
-            [0,0,0,1,1,0,0,0],
-            [0,0,0,1,1,0,0,0],
-            [0,0,1,1,1,1,0,0]
-        ]
-        for row in range(8):
-            for col in range(8):
-                if clover_pattern[row][col]:
-                    px = x - (size//2) + col * pixel_size
-                    py = y - (size//2) + row * pixel_size
-                    # Green clover
-                    pygame.draw.rect(surface, (34, 177, 76), (px, py, pixel_size, pixel_size))
-    
-    def draw_attribute_icons(self, surface):
-        """Draw pixelated attribute icons around the sprite"""
+
+    def remember_position(self):
+        """Keep the fighter position from before the next tick, for interpolation"""
+        self.previous_position = (self.fighter.x, self.fighter.y)
+
+    def sync(self, alpha=1.0):
+        """
+        Match the sprite image and position to the fighter state.
+        `alpha` blends from the position before the last tick (0) to the
+        current one (1), so motion stays smooth between fixed ticks.
+        """
+        size = int(self.fighter.current_size)
+        if size != self.image_size:
+            self.image_size = size
+            self.update_image_size()
+        previous_x, previous_y = self.previous_position
+        self.rect.center = (previous_x + (self.fighter.x - previous_x) * alpha,
+                            previous_y + (self.fighter.y - previous_y) * alpha)
+
+    def attribute_icon_blits(self):
+        """(surface, position) pairs for the attribute icons around the sprite"""
         if self.hp <= 0:
-            return
+            return []
         
         icons_to_draw = []
         
@@ -434,41 +159,68 @@ class Follower(pygame.sprite.Sprite):
             icons_to_draw.append('clover')
         
         if not icons_to_draw:
-            return
+            return []
         
-        # Calculate icon positions
-        icon_size = min(24, max(16, self.current_size // 3))
+        # Baked icons at precomputed positions
+        size = self.current_size
+        icon_size = icon_cache.icon_size(size)
         center_x, center_y = self.rect.center
-        radius = self.current_size // 2 + icon_size
         
-        for i, icon_type in enumerate(icons_to_draw):
-            # Position icons evenly around the sprite
-            angle = (360 / len(icons_to_draw)) * i - 90
-            x = center_x + radius * math.cos(math.radians(angle))
-            y = center_y + radius * math.sin(math.radians(angle))
-            
-            # Draw black background circle
-            pygame.draw.circle(surface, (0, 0, 0), (int(x), int(y)), icon_size // 2 + 1)
-            
-            # Draw the pixelated icon
-            if icon_type == 'heart':
-                self.draw_pixelated_heart(surface, int(x), int(y), icon_size)
-            elif icon_type == 'sword':
-                self.draw_pixelated_sword(surface, int(x), int(y), icon_size)
-            elif icon_type == 'shield':
-                self.draw_pixelated_shield(surface, int(x), int(y), icon_size)
-            elif icon_type == 'clover':
-                self.draw_pixelated_clover(surface, int(x), int(y), icon_size)
+        blits = []
+        for icon_type, (dx, dy) in zip(icons_to_draw, icon_cache.layout(len(icons_to_draw), size)):
+            image, offset = icon_cache.sprite(icon_type, icon_size)
+            blits.append((image, (int(center_x + dx) - offset, int(center_y + dy) - offset)))
+        return blits
     
-    def draw_health_bar(self, surface):
-        if self.hp > 0:
-            bar_length = self.current_size  # Scale bar with sprite size
-            bar_height = 5
-            fill = (self.hp / self.max_hp) * bar_length
-            outline_rect = pygame.Rect(self.rect.centerx - bar_length//2, self.rect.top - bar_height - 2, bar_length, bar_height)
-            fill_rect = pygame.Rect(self.rect.centerx - bar_length//2, self.rect.top - bar_height - 2, fill, bar_height)
-            pygame.draw.rect(surface, GREEN, fill_rect)
-            pygame.draw.rect(surface, WHITE, outline_rect, 1)
+    def health_bar_blit(self):
+        """(surface, position) for the health bar - the bar itself is only redrawn when HP or size change"""
+        if self.hp <= 0:
+            return None
+        
+        bar_length = self.current_size  # Scale bar with sprite size
+        bar_height = 5
+        fill = (self.hp / self.max_hp) * bar_length
+        outline_rect = pygame.Rect(self.rect.centerx - bar_length//2, self.rect.top - bar_height - 2, bar_length, bar_height)
+        
+        if not SCREEN_RECT.contains(outline_rect):
+            # pygame draws the outline of the clipped rect at screen edges -
+            # draw into a surface clipped the same way (rare, not cached)
+            visible = outline_rect.clip(SCREEN_RECT)
+            if not visible.w or not visible.h:
+                return None
+            return self.draw_health_bar_surface(
+                visible.size, outline_rect.move(-visible.x, -visible.y), fill
+            ), visible.topleft
+        
+        key = (self.hp, self.max_hp, bar_length)
+        if self.health_bar_key != key:
+            self.health_bar_key = key
+            self.health_bar = self.draw_health_bar_surface(
+                outline_rect.size, outline_rect.move(-outline_rect.x, -outline_rect.y), fill
+            )
+        return self.health_bar, outline_rect.topleft
+    
+    def draw_health_bar_surface(self, size, outline_rect, fill):
+        # Colorkey keeps the empty part of the bar see-through
+        surface = pygame.Surface(size)
+        surface.fill(BAR_COLORKEY)
+        surface.set_colorkey(BAR_COLORKEY)
+        fill_rect = pygame.Rect(outline_rect.x, outline_rect.y, fill, outline_rect.h)
+        pygame.draw.rect(surface, GREEN, fill_rect)
+        pygame.draw.rect(surface, WHITE, outline_rect, 1)
+        return surface
+    
+    def overlay_blits(self, font):
+        """Health bar, icons and name label as (surface, position) pairs, in draw order"""
+        blits = []
+        health_bar = self.health_bar_blit()
+        if health_bar:
+            blits.append(health_bar)
+        blits.extend(self.attribute_icon_blits())
+        
+        user_text = text_cache.render(font, self.username, WHITE)
+        blits.append((user_text, user_text.get_rect(center=(self.rect.centerx, self.rect.bottom + 8))))
+        return blits
 
 def draw_crown(surface, x, y, size):
     """Draw an improved crown with better quality"""
@@ -521,7 +273,7 @@ def draw_crown(surface, x, y, size):
     surface.blit(crown_surface, crown_rect)
 
 # --- Main Game Function ---
-def game_loop():
+def game_loop(seed=None):
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Clube da Luta - Battle Royale")
@@ -530,163 +282,158 @@ def game_loop():
     winner_font = pygame.font.Font(None, 74)
     stats_font = pygame.font.Font(None, 36)
 
-    # Load follower data from users.json
+    # Active followers and their paid bonuses, from the compiled roster
+    # (rebuilt from users.json and the databases when they change)
     try:
-        with open("users.json", "r") as f:
-            users_data = json.load(f)
+        active_followers, attributes = load_roster()
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error loading users.json: {e}")
         return
 
     # Create a sprite group and populate it
     all_sprites = pygame.sprite.Group()
-    active_followers = [u for u in users_data if u.get("is_active_follower")]
+    sprites_by_fighter = {}
+
+    # One seed drives the whole match - pass it back in to replay a battle
+    match_rng = MatchRandom(seed)
+    print(f"Match seed: {match_rng.seed}")
+
+    # Decode every avatar up front (parallel, cached in an atlas between launches)
+    avatar_paths = [u.get("profile_pic_path") for u in active_followers] + [DEFAULT_AVATAR_PATH]
+    avatar_cache.preload(load_avatar_atlas(avatar_paths), INITIAL_SIZE)
     
     for user in active_followers:
-        follower = Follower(user)
+        follower = Follower(user, match_rng, attributes)
         all_sprites.add(follower)
+        sprites_by_fighter[follower.fighter] = follower
     
     # Start logging the game
-    game_logger.start_game(active_followers)
+    game_logger.start_game(active_followers, seed=match_rng.seed)
+
+    def on_hit(attacker, victim, damage, critical):
+        if critical:
+            print(f"CRITICAL HIT by {attacker.username}!")
+        print(f"{attacker.username} hits {victim.username} for {damage} damage. {victim.username} HP: {victim.hp}")
+        
+        # Log damage to database
+        game_logger.log_damage(attacker.username, victim.username, damage, critical, simulation.tick)
+
+    def on_kill(killer, victim):
+        print(f"--- {victim.username} has been eliminated by {killer.username}! ---")
+        # Log kill to database
+        game_logger.log_kill(killer.username, victim.username)
+
+    # The simulation owns all battle logic - this loop only renders it
+    simulation = BattleSimulation(
+        [sprite.fighter for sprite in all_sprites],
+        on_hit=on_hit,
+        on_kill=on_kill
+    )
 
     running = True
     winner = None
     winner_display_size = 0
-    total_deaths = 0
     initial_count = len(all_sprites)
 
+    # The survivor counter only changes on deaths - re-render it then
+    counter_value = None
+    counter_text = None
+
+    # Screen areas drawn last frame, when only those are being updated
+    dirty_rects = None
+
+    # Real time not yet simulated - start with one tick due
+    tick_ms = 1000 / TICK_RATE
+    accumulator = tick_ms
+
     # Main game loop
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
-        # Update all sprites
-        all_sprites.update()
+        # Advance the battle by as many fixed ticks as real time allows
+        ticks = 0
+        while accumulator >= tick_ms and ticks < MAX_TICKS_PER_FRAME and not simulation.finished:
+            for sprite in all_sprites:
+                sprite.remember_position()
+            eliminated = simulation.step()
+            accumulator -= tick_ms
+            ticks += 1
 
-        # Collision Detection - Check every pair once
-        sprites_list = list(all_sprites.sprites())
-        to_remove = []  # Track sprites to remove
-        survivors = len(all_sprites)
-        is_final_two = (survivors == 2)  # Check if we're down to final 2
-        
-        # Boost growth and speed when few survivors remain
-        if survivors <= 5 and survivors > 1:
-            for sprite in sprites_list:
-                # Extra growth for final survivors
-                if sprite.current_size < MAX_SIZE + 20:  # Allow extra growth in endgame
-                    sprite.current_size = min(sprite.current_size + 0.5, MAX_SIZE + 20)
-                    sprite.radius = sprite.current_size // 2
-                    sprite.update_image_size()
-                
-                # Speed boost for final survivors
-                if survivors <= 3:
-                    sprite.speed_multiplier = min(sprite.speed_multiplier * 1.002, 4.0)
-                    # Ensure minimum velocity to prevent getting stuck
-                    if sprite.velocity.length() < 3.0:
-                        sprite.velocity.scale_to_length(3.0)
-                    
-                    # Push away from corners to prevent getting stuck
-                    corner_threshold = 150
-                    center_x, center_y = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
-                    
-                    # If too close to corners, apply force toward center
-                    if (sprite.pos.x < corner_threshold or sprite.pos.x > SCREEN_WIDTH - corner_threshold) and \
-                       (sprite.pos.y < corner_threshold or sprite.pos.y > SCREEN_HEIGHT - corner_threshold):
-                        # Create vector pointing to center
-                        to_center = pygame.math.Vector2(center_x - sprite.pos.x, center_y - sprite.pos.y)
-                        if to_center.length() > 0:
-                            to_center.normalize_ip()
-                            # Add gentle push toward center
-                            sprite.velocity += to_center * 0.5
-        
-        for i in range(len(sprites_list)):
-            for j in range(i + 1, len(sprites_list)):
-                sprite1 = sprites_list[i]
-                sprite2 = sprites_list[j]
+            # Remove dead sprites
+            if eliminated:
+                for fighter in eliminated:
+                    sprites_by_fighter[fighter].kill()
+                    text_cache.evict(font, fighter.username, WHITE)
                 
-                # Check circular collision
-                distance = sprite1.pos.distance_to(sprite2.pos)
-                if distance < (sprite1.radius + sprite2.radius):
-                    # Handle physics collision
-                    sprite1.collide_with(sprite2)
-                    
-                    # Handle combat - check for simultaneous death prevention
-                    if is_final_two:
-                        # In final 2, only one can die per collision
-                        sprite1_kills = sprite1.deal_damage(sprite2, is_final_two)
-                        if sprite1_kills:
-                            to_remove.append(sprite2)
-                        elif not sprite1_kills:  # Only check sprite2 damage if sprite1 didn't kill
-                            sprite2_kills = sprite2.deal_damage(sprite1, is_final_two)
-                            if sprite2_kills:
-                                to_remove.append(sprite1)
-                    else:
-                        # Normal combat for more than 2 players
-                        if sprite1.deal_damage(sprite2, is_final_two):
-                            to_remove.append(sprite2)
-                        if sprite2.deal_damage(sprite1, is_final_two):
-                            to_remove.append(sprite1)
-        
-        # Remove dead sprites and update all survivors
-        if to_remove:
-            for sprite in to_remove:
-                if sprite in all_sprites:
-                    sprite.kill()
-                    total_deaths += 1
-            
-            # Update size and speed for all remaining sprites
-            for sprite in all_sprites:
-                sprite.update_size_and_speed(total_deaths)
-            
-            # Calculate actual size for logging
-            if total_deaths > 0:
-                growth_factor = math.log(total_deaths + 1) * 8
-                current_size = min(int(INITIAL_SIZE + growth_factor), MAX_SIZE)
-            else:
-                current_size = INITIAL_SIZE
-            print(f"Deaths: {total_deaths}, Size: {current_size}px")
+                # Calculate actual size for logging
+                total_deaths = simulation.total_deaths
+                if total_deaths > 0:
+                    growth_factor = math.log(total_deaths + 1) * 8
+                    current_size = min(int(INITIAL_SIZE + growth_factor), MAX_SIZE)
+                else:
+                    current_size = INITIAL_SIZE
+                print(f"Deaths: {total_deaths}, Size: {current_size}px")
+
+        # Too far behind - drop the backlog instead of spiralling
+        if accumulator >= tick_ms:
+            accumulator %= tick_ms
+
+        # Render between the last two ticks
+        alpha = accumulator / tick_ms
+        for sprite in all_sprites:
+            sprite.sync(alpha)
 
-        # --- Draw / Render ---
-        screen.fill(BLACK)
-        
         # Check for winner
         survivors = len(all_sprites)
-        if survivors == 1 and not winner:
-            winner = all_sprites.sprites()[0]
-            winner_display_size = 0  # Start animation
-            # Log game end
-            game_logger.end_game(winner.username)
-        elif survivors == 0 and not winner:
-            winner = "Nobody"  # Everyone died
-            # Log game end with no winner
-            game_logger.end_game("DRAW")
+        if simulation.finished and not winner:
+            if simulation.winner:
+                winner = sprites_by_fighter[simulation.winner]
+                winner_display_size = 0  # Start animation
+                # Log game end - duration in simulated time, the same on any machine
+                game_logger.end_game(winner.username, simulation.time_ms / 1000)
+            else:
+                winner = "Nobody"  # Everyone died
+                # Log game end with no winner
+                game_logger.end_game("DRAW", simulation.time_ms / 1000)
+
+        # --- Draw / Render ---
+        # With few fighters left only last frame's areas need clearing
+        use_dirty_rects = not winner and survivors <= DIRTY_RECT_SURVIVORS
+        if use_dirty_rects and dirty_rects is not None:
+            for rect in dirty_rects:
+                screen.fill(BLACK, rect)
+        else:
+            screen.fill(BLACK)
+        drawn_rects = None
 
         # Normal game display
         if not winner:
-            all_sprites.draw(screen)
-
+            # Every sprite first, then each fighter's bar, icons and name,
+            # then the HUD - all in a single blits call
+            blit_sequence = [(sprite.image, sprite.rect) for sprite in all_sprites]
             for sprite in all_sprites:
-                sprite.draw_health_bar(screen)
-                sprite.draw_attribute_icons(screen)
-                user_text = font.render(sprite.username, True, WHITE)
-                text_rect = user_text.get_rect(center=(sprite.rect.centerx, sprite.rect.bottom + 8))
-                screen.blit(user_text, text_rect)
+                blit_sequence.extend(sprite.overlay_blits(font))
 
             # Counter display
-            counter_text = stats_font.render(f"Survivors: {survivors}/{initial_count}", True, WHITE)
-            screen.blit(counter_text, (10, 10))
+            if survivors != counter_value:
+                counter_value = survivors
+                counter_text = stats_font.render(f"Survivors: {survivors}/{initial_count}", True, WHITE)
+            blit_sequence.append((counter_text, (10, 10)))
             
             # Final showdown indicator
             if survivors == 2:
-                final_text = stats_font.render("FINAL SHOWDOWN!", True, RED)
+                final_text = text_cache.render(stats_font, "FINAL SHOWDOWN!", RED)
                 final_rect = final_text.get_rect(center=(SCREEN_WIDTH // 2, 50))
-                screen.blit(final_text, final_rect)
+                blit_sequence.append((final_text, final_rect))
+
+            drawn_rects = screen.blits(blit_sequence, doreturn=use_dirty_rects)
         
         # Winner display
         else:
             if isinstance(winner, str):
-                win_text = winner_font.render("DRAW - Nobody survived!", True, GREEN)
+                win_text = text_cache.render(winner_font, "DRAW - Nobody survived!", GREEN)
                 win_rect = win_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
                 screen.blit(win_text, win_rect)
             else:
@@ -699,16 +446,8 @@ def game_loop():
                 center_y = SCREEN_HEIGHT // 2
                 
                 if winner.original_image:
-                    # Scale winner image
-                    big_image = pygame.transform.scale(winner.original_image, 
-                                                      (winner_display_size, winner_display_size))
-                    
-                    # Create circular mask
-                    masked_image = pygame.Surface((winner_display_size, winner_display_size), pygame.SRCALPHA)
-                    masked_image.fill((0, 0, 0, 0))
-                    radius = winner_display_size // 2
-                    pygame.draw.circle(masked_image, (255, 255, 255, 255), (radius, radius), radius)
-                    masked_image.blit(big_image, (0, 0), special_flags=pygame.BLEND_RGBA_MIN)
+                    # Scaled, masked winner image
+                    masked_image = avatar_cache.masked_avatar(winner.avatar_key, winner_display_size)
                     
                     # Draw winner
                     image_rect = masked_image.get_rect(center=(center_x, center_y))
@@ -732,24 +471,30 @@ def game_loop():
                         draw_crown(screen, center_x, crown_y + 10, 60)
                 
                 # Draw winner text
-                win_text = winner_font.render(f"{winner.username}", True, GOLD)
+                win_text = text_cache.render(winner_font, winner.username, GOLD)
                 win_rect = win_text.get_rect(center=(center_x, center_y + winner_display_size // 2 + 50))
                 screen.blit(win_text, win_rect)
                 
-                wins_text = stats_font.render("WINS!", True, GREEN)
+                wins_text = text_cache.render(stats_font, "WINS!", GREEN)
                 wins_rect = wins_text.get_rect(center=(center_x, center_y + winner_display_size // 2 + 90))
                 screen.blit(wins_text, wins_rect)
                 
                 # Final stats
-                stats_text = font.render(f"Defeated {initial_count - 1} opponents", True, WHITE)
+                stats_text = text_cache.render(font, f"Defeated {initial_count - 1} opponents", WHITE)
                 stats_rect = stats_text.get_rect(center=(center_x, center_y + winner_display_size // 2 + 120))
                 screen.blit(stats_text, stats_rect)
 
         # Update the display
-        pygame.display.flip()
-        clock.tick(FPS)
+        if use_dirty_rects and dirty_rects is not None:
+            pygame.display.update(dirty_rects + drawn_rects)
+        else:
+            pygame.display.flip()
+        dirty_rects = drawn_rects if use_dirty_rects else None
+        accumulator += clock.tick(RENDER_FPS)
 
+    game_logger.close()  # Write out any queued statistics
     pygame.quit()
 
 if __name__ == "__main__":
-    game_loop()
\ No newline at end of file
+    import sys
+    game_loop(int(sys.argv[1]) if len(sys.argv) > 1 else None)
\ No newline at end of file
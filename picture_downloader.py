@@ -0,0 +1,178 @@
+"""
+Profile Picture Downloader
+Fetches many pictures at once over pooled keep-alive connections.
+
+- A fixed number of worker threads share one requests.Session, whose
+  connection pool is sized to match, so TLS handshakes are paid once
+  per connection instead of once per picture.
+- Bodies are streamed to a temp file next to the target and renamed
+  into place, so an interrupted download never leaves a truncated
+  picture that the game would try to load.
+- Politeness comes from a per-host rate limit, not fixed sleeps, and
+  transient failures (timeouts, 429, 5xx) are retried with exponential
+  backoff and jitter, honouring Retry-After.
+- A picture already on disk can be revalidated with the ETag /
+  Last-Modified it was saved with; a 304 keeps the local file without a
+  transfer. Validators only apply to the picture they came from.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PROFILES_DIR = 'profiles'
+CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 60  # Seconds - don't let one server stall the whole batch
+
+
+class HostRateLimiter:
+    """Token bucket per host: `rate` requests per second, bursts up to `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.buckets = {}  # host -> (tokens, last refill)
+
+    def wait(self, host):
+        """Block until a request to `host` is allowed"""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                tokens, last = self.buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self.buckets[host] = (tokens - 1, now)
+                    return
+                self.buckets[host] = (tokens, now)
+                delay = (1 - tokens) / self.rate
+            time.sleep(delay)
+
+
+class PictureDownloader:
+    """
+    Bounded-concurrency picture downloader.
+
+    requests.Session is shared between the workers, which is fine for
+    plain GETs; its urllib3 pool hands each thread its own connection.
+    """
+
+    def __init__(self, directory=PROFILES_DIR, workers=8, per_host_rate=10.0,
+                 retries=3, backoff=0.5, timeout=10):
+        self.directory = directory
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(per_host_rate, burst=workers)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def retry_delay(self, attempt, response=None):
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), MAX_RETRY_AFTER)
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def fetch(self, url, filepath, etag=None, last_modified=None):
+        """
+        Stream `url` into `filepath`. Passing the validators of the file
+        already at `filepath` makes the request conditional.
+        Returns {'path', 'etag', 'last_modified', 'changed'}, or None once
+        retries run out.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(host)
+            response = None
+            try:
+                response = self.session.get(url, stream=True, timeout=self.timeout, headers=headers)
+                if response.status_code in (200, 304):
+                    changed = response.status_code == 200
+                    if changed:
+                        self.save(response, filepath)
+                    return {
+                        'path': filepath,
+                        'etag': response.headers.get('ETag', etag),
+                        'last_modified': response.headers.get('Last-Modified', last_modified),
+                        'changed': changed,
+                    }
+                if response.status_code not in RETRY_STATUSES:
+                    return None  # 403, 404... won't get better
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                pass  # Transient - retry
+            finally:
+                if response is not None:
+                    response.close()
+
+            if attempt < self.retries:
+                time.sleep(self.retry_delay(attempt, response))
+        return None
+
+    def save(self, response, filepath):
+        """Write the body to a temp file and rename it over `filepath`"""
+        # Named per process and thread, and created with open() rather than
+        # mkstemp (always 0600) so the picture gets the usual umask permissions
+        temp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(temp_path, filepath)
+        except:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def download(self, username, url, validators=None):
+        """fetch() result for `username`'s picture, or None if it couldn't be downloaded"""
+        filepath = os.path.join(self.directory, f"{username}.jpg")
+        try:
+            return self.fetch(url, filepath, *(validators or (None, None)))
+        except (OSError, requests.RequestException):
+            return None
+
+    def download_all(self, items, on_result=None, validators=None):
+        """
+        Download [(username, url), ...] concurrently - returns {username: result or None}.
+        `validators` maps usernames to the (etag, last_modified) of their
+        picture on disk. `on_result(username, result)` runs on the calling
+        thread as each one finishes.
+        """
+        validators = validators or {}
+        os.makedirs(self.directory, exist_ok=True)
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(self.download, username, url, validators.get(username)): username
+                for username, url in items
+            }
+            for future in as_completed(futures):
+                username = futures[future]
+                results[username] = future.result()
+                if on_result:
+                    on_result(username, results[username])
+        return results
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,240 @@
+"""
+Render Caches
+Surfaces the pygame front-end would otherwise rebuild over and over.
+Cached surfaces are shared between sprites, so treat them as read-only.
+"""
+
+from collections import OrderedDict
+
+import math
+
+import pygame
+
+DEFAULT_AVATAR_PATH = "profiles/default_avatar.png"
+
+# 8x8 attribute icons shown around fighters with paid bonuses
+ICON_PATTERNS = {
+    'heart': [
+        [0,1,1,0,0,1,1,0],
+        [1,1,1,1,1,1,1,1],
+        [1,1,1,1,1,1,1,1],
+        [1,1,1,1,1,1,1,1],
+        [0,1,1,1,1,1,1,0],
+        [0,0,1,1,1,1,0,0],
+        [0,0,0,1,1,0,0,0],
+        [0,0,0,0,0,0,0,0]
+    ],
+    'sword': [
+        [0,0,0,0,0,0,1,0],
+        [0,0,0,0,0,1,1,1],
+        [0,0,0,0,1,1,1,0],
+        [0,0,0,1,1,1,0,0],
+        [0,0,1,1,1,0,0,0],
+        [0,1,1,1,0,0,0,0],
+        [1,1,1,0,0,0,0,0],
+        [1,1,0,0,0,0,0,0]
+    ],
+    'shield': [
+        [0,1,1,1,1,1,1,0],
+        [1,1,1,1,1,1,1,1],
+        [1,1,1,1,1,1,1,1],
+        [1,1,1,1,1,1,1,1],
+        [1,1,1,1,1,1,1,1],
+        [0,1,1,1,1,1,1,0],
+        [0,0,1,1,1,1,0,0],
+        [0,0,0,1,1,0,0,0]
+    ],
+    'clover': [
+        [0,1,1,0,0,1,1,0],
+        [1,1,1,1,1,1,1,1],
+        [1,1,1,1,1,1,1,1],
+        [0,1,1,1,1,1,1,0],
+        [0,0,0,1,1,0,0,0],
+        [0,0,0,1,1,0,0,0],
+        [0,0,0,1,1,0,0,0],
+        [0,0,1,1,1,1,0,0]
+    ],
+}
+
+
+def icon_pixel_color(icon, row, col):
+    """Color of one lit pixel of an icon pattern"""
+    if icon == 'heart':
+        return (255, 80, 120)
+    if icon == 'sword':
+        # Brown handle, silver blade
+        return (139, 69, 19) if row < 2 or col < 2 else (192, 192, 192)
+    if icon == 'shield':
+        # Blue shield with silver trim
+        return (192, 192, 192) if row in (0, 7) or col in (0, 7) else (64, 128, 255)
+    return (34, 177, 76)  # Green clover
+
+
+class AvatarCache:
+    """
+    Decoded avatars by path, plus circular-masked copies keyed by
+    (avatar, integer size) with LRU eviction.
+
+    An avatar key is either an image path passed to load() or an RGB
+    fallback color, which gets a plain colored circle.
+    """
+
+    def __init__(self, max_masked=1024):
+        self.max_masked = max_masked
+        self.decoded = {}
+        self.reduced = set()  # Paths whose decoded image is a tile-sized atlas copy
+        self.masked = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path):
+        """Decode an image once - raises pygame.error/FileNotFoundError like pygame.image.load"""
+        image = self.decoded.get(path)
+        if image is None:
+            image = pygame.image.load(path).convert_alpha()
+            self.decoded[path] = image
+        return image
+
+    def preload(self, avatars, size):
+        """
+        Seed the cache from {path: (source, masked sprite at size)}, e.g. an
+        atlas. Sprites bigger than those sources are cut from the file.
+        """
+        for path, (source, masked) in avatars.items():
+            self.decoded[path] = source
+            self.reduced.add(path)
+            self.masked[(path, size)] = masked
+
+    def source(self, path, size):
+        """The decoded avatar to scale down to `size` - the file itself when an atlas copy is too small"""
+        image = self.decoded[path]
+        if path in self.reduced and size > min(image.get_size()):
+            self.reduced.discard(path)
+            try:
+                image = self.decoded[path] = pygame.image.load(path).convert_alpha()
+            except (pygame.error, FileNotFoundError):
+                pass  # Gone since the atlas was built - upscale the copy
+        return image
+
+    def masked_avatar(self, key, size):
+        """Circular avatar for `key` at size x size"""
+        cache_key = (key, int(size))
+        image = self.masked.get(cache_key)
+        if image is not None:
+            self.masked.move_to_end(cache_key)
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        image = self.build_masked(key, int(size))
+        self.masked[cache_key] = image
+        if len(self.masked) > self.max_masked:
+            self.masked.popitem(last=False)  # Least recently used
+        return image
+
+    def build_masked(self, key, size):
+        radius = size // 2
+        image = pygame.Surface((size, size), pygame.SRCALPHA)
+        image.fill((0, 0, 0, 0))  # Transparent background
+
+        if isinstance(key, tuple):
+            # Fallback colored circle without border
+            pygame.draw.circle(image, key, (radius, radius), radius)
+        else:
+            # Scale the avatar and cut it to a circle
+            scaled = pygame.transform.scale(self.source(key, size), (size, size))
+            pygame.draw.circle(image, (255, 255, 255, 255), (radius, radius), radius)
+            image.blit(scaled, (0, 0), special_flags=pygame.BLEND_RGBA_MIN)
+        return image
+
+    def clear(self):
+        self.decoded.clear()
+        self.reduced.clear()
+        self.masked.clear()
+
+
+class TextCache:
+    """
+    Rendered text surfaces keyed by (font, text, color).
+    Text that stops being drawn (a dead fighter's name) should be evicted.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+
+    def render(self, font, text, color):
+        """Antialiased font.render, rasterized once per key"""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+        return surface
+
+    def evict(self, font, text, color):
+        self.surfaces.pop((font, text, color), None)
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class IconCache:
+    """
+    Attribute icons baked once per size (black backing circle included),
+    and icon positions around a sprite per (icon count, sprite size).
+    """
+
+    COLORKEY = (255, 0, 255)  # Not used by any icon
+
+    def __init__(self):
+        self.sprites = {}
+        self.layouts = {}
+
+    @staticmethod
+    def icon_size(sprite_size):
+        return min(24, max(16, sprite_size // 3))
+
+    def sprite(self, icon, size):
+        """(surface, offset) - blit the surface at (x - offset, y - offset) to center it on (x, y)"""
+        key = (icon, size)
+        cached = self.sprites.get(key)
+        if cached is None:
+            cached = self.sprites[key] = self.bake(icon, size)
+        return cached
+
+    def bake(self, icon, size):
+        backing = int(size // 2 + 1)
+        surface = pygame.Surface((2 * backing + 1, 2 * backing + 1))
+        surface.fill(self.COLORKEY)
+        surface.set_colorkey(self.COLORKEY, pygame.RLEACCEL)
+
+        # Black background circle, then the 8x8 pattern
+        pygame.draw.circle(surface, (0, 0, 0), (backing, backing), backing)
+        pixel_size = max(1, size // 8)
+        pattern = ICON_PATTERNS[icon]
+        for row in range(8):
+            for col in range(8):
+                if pattern[row][col]:
+                    px = backing - (size//2) + col * pixel_size
+                    py = backing - (size//2) + row * pixel_size
+                    pygame.draw.rect(surface, icon_pixel_color(icon, row, col), (px, py, pixel_size, pixel_size))
+        return surface, backing
+
+    def layout(self, count, sprite_size):
+        """Icon center offsets from the sprite center, evenly spaced from the top"""
+        key = (count, sprite_size)
+        offsets = self.layouts.get(key)
+        if offsets is None:
+            radius = sprite_size // 2 + self.icon_size(sprite_size)
+            offsets = []
+            for i in range(count):
+                angle = (360 / count) * i - 90
+                offsets.append((radius * math.cos(math.radians(angle)), radius * math.sin(math.radians(angle))))
+            self.layouts[key] = offsets
+        return offsets
+
+
+# Global cache instances
+avatar_cache = AvatarCache()
+text_cache = TextCache()
+icon_cache = IconCache()
@@ -0,0 +1,319 @@
+"""
+Compiled Roster
+Merges users.json, scraped_users.db and the paid attribute table into one
+binary file (cache/roster.bin) that the game maps into memory at startup
+instead of parsing the whole pretty-printed users.json.
+
+Only active followers are compiled. Layout, little-endian:
+    magic, version, header length
+    header  - JSON: source signatures and content hashes, record count
+    records - one fixed-width RECORD per fighter
+    strings - UTF-8 string table the records point into, by character
+              offset, so it is decoded with one call
+
+The cache is rebuilt when a source changed. Sources are first compared
+by (mtime, size), which costs a few stat calls; when that differs the
+source's content hash decides, so a match that only wrote statistics to
+game_stats.db doesn't force a recompile.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+
+from simulation import ATTRIBUTE_COLUMNS, load_attribute_table
+
+ROSTER_FILE = os.path.join('cache', 'roster.bin')
+USERS_FILE = 'users.json'
+SCRAPED_DB = 'scraped_users.db'
+STATS_DB = 'game_stats.db'
+ATTRIBUTES_JSON = 'atributos.json'
+
+MAGIC = b'FCROSTER'
+ROSTER_VERSION = 3
+PREAMBLE = struct.Struct('<8sII')  # magic, version, header length
+
+# username (offset, length), picture path (offset, length), flags,
+# stats hp/strength/armor/luck, bonuses in ATTRIBUTE_COLUMNS order.
+# Stats and bonuses are doubles so hand-edited fractional values survive
+RECORD = struct.Struct('<IIIIIdddddddd')
+HAS_STATS = 1
+HAS_PICTURE_PATH = 2
+HAS_BONUSES = 4
+
+STAT_KEYS = ('hp', 'strength', 'armor', 'luck')
+BONUS_KEYS = tuple(key for _, key in ATTRIBUTE_COLUMNS)
+
+
+def file_signatures(paths):
+    """[mtime_ns, size] per file, None for missing ones"""
+    signatures = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signatures.append(None)
+        else:
+            signatures.append([stat.st_mtime_ns, stat.st_size])
+    return signatures
+
+
+def hash_users_file(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_scraped_pictures(db_path):
+    """{username: profile_pic_path} for scraped users that have a picture"""
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            rows = conn.execute('''
+                SELECT username, profile_pic_path FROM users
+                WHERE has_picture AND profile_pic_path IS NOT NULL
+                ORDER BY username
+            ''').fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        rows = []  # No scraper database yet
+    return dict(rows)
+
+
+def hash_rows(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+class RosterSources:
+    """
+    The inputs of the compiled roster. Every source is a set of files
+    (SQLite sources include their -wal file) plus a content hash that is
+    only computed when those files changed.
+    """
+
+    def __init__(self, users_file=USERS_FILE, scraped_db=SCRAPED_DB,
+                 stats_db=STATS_DB, attributes_json=ATTRIBUTES_JSON):
+        self.users_file = users_file
+        self.scraped_db = scraped_db
+        self.stats_db = stats_db
+        self.attributes_json = attributes_json
+        self.files = {
+            'users': [users_file],
+            'scraped': [scraped_db, scraped_db + '-wal'],
+            'attributes': [stats_db, stats_db + '-wal', attributes_json],
+        }
+        self.loaded = {}
+
+    def load(self, name):
+        """Parsed content of a source, read once"""
+        if name not in self.loaded:
+            if name == 'users':
+                with open(self.users_file, 'r', encoding='utf-8') as f:
+                    self.loaded[name] = json.load(f)
+            elif name == 'scraped':
+                self.loaded[name] = read_scraped_pictures(self.scraped_db)
+            else:
+                self.loaded[name] = load_attribute_table(self.stats_db, self.attributes_json)
+        return self.loaded[name]
+
+    def content_hash(self, name):
+        if name == 'users':
+            return hash_users_file(self.users_file)
+        return hash_rows(self.load(name))
+
+    def signatures(self):
+        return {name: file_signatures(paths) for name, paths in self.files.items()}
+
+
+def compile_roster(sources, roster_file=ROSTER_FILE):
+    """Merge the sources into a roster file - returns its header"""
+    signatures = sources.signatures()  # Before reading, so a later edit still invalidates
+    users = sources.load('users')
+    pictures = sources.load('scraped')
+    attributes = sources.load('attributes')
+
+    strings = []
+    string_offsets = {}
+    strings_length = 0
+
+    def add_string(text):
+        nonlocal strings_length
+        offset = string_offsets.get(text)
+        if offset is None:
+            offset = string_offsets[text] = strings_length
+            strings.append(text)
+            strings_length += len(text)
+        return offset, len(text)
+
+    records = bytearray()
+    count = 0
+    for user in users:
+        if not user.get("is_active_follower"):
+            continue
+        username = user.get("instagram_username", "Unknown")
+        flags = 0
+
+        # users.json wins, the scraper database fills in missing pictures
+        path = user.get("profile_pic_path") or pictures.get(username)
+        path_offset = path_length = 0
+        if path:
+            flags |= HAS_PICTURE_PATH
+            path_offset, path_length = add_string(path)
+
+        stats = user.get('stats')
+        stat_values = [0, 0, 0, 0]
+        if stats is not None:
+            flags |= HAS_STATS
+            stat_values = [float(stats.get(key, 0)) for key in STAT_KEYS]
+
+        bonuses = attributes.get(username)
+        bonus_values = [0, 0, 0, 0]
+        if bonuses is not None:
+            flags |= HAS_BONUSES
+            bonus_values = [float(bonuses.get(key, 0) or 0) for key in BONUS_KEYS]
+
+        name_offset, name_length = add_string(username)
+        records.extend(RECORD.pack(name_offset, name_length, path_offset, path_length, flags,
+                                   *stat_values, *bonus_values))
+        count += 1
+
+    body = bytes(records) + ''.join(strings).encode('utf-8')
+    header = {
+        'count': count,
+        'body_bytes': len(body),
+        'signatures': signatures,
+        'hashes': {name: sources.content_hash(name) for name in sources.files},
+    }
+    write_roster(roster_file, header, body)
+    return header
+
+
+def write_roster(roster_file, header, body):
+    """Write header and body atomically - a crash never leaves half a roster"""
+    header_bytes = json.dumps(header).encode()
+    os.makedirs(os.path.dirname(roster_file) or '.', exist_ok=True)
+    temp_file = roster_file + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, ROSTER_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(body)
+    os.replace(temp_file, roster_file)
+
+
+def read_header(data):
+    """(header, body offset) of a mapped roster, or None if it isn't one"""
+    if len(data) < PREAMBLE.size:
+        return None
+    magic, version, header_length = PREAMBLE.unpack_from(data)
+    if magic != MAGIC or version != ROSTER_VERSION:
+        return None
+    start = PREAMBLE.size
+    try:
+        header = json.loads(bytes(data[start:start + header_length]))
+    except ValueError:
+        return None
+    return header, start + header_length
+
+
+def number(value):
+    """A stored double back as the int it usually was"""
+    return int(value) if value.is_integer() else value
+
+
+def decode_roster(data, header, body_offset):
+    """
+    (active followers as users.json-style dicts, attribute table). Raises
+    ValueError or struct.error on a truncated or inconsistent file.
+    """
+    if len(data) - body_offset != header['body_bytes']:
+        raise ValueError("roster body doesn't match its header")
+    records_end = body_offset + header['count'] * RECORD.size
+    strings = str(data[records_end:], 'utf-8')
+    followers = []
+    attributes = {}
+
+    hp_key, forca_key, armadura_key, sorte_key = BONUS_KEYS
+    for (name_offset, name_length, path_offset, path_length, flags,
+         hp, strength, armor, luck,
+         bonus_hp, bonus_forca, bonus_armadura, bonus_sorte) in RECORD.iter_unpack(data[body_offset:records_end]):
+        username = strings[name_offset:name_offset + name_length]
+        user = {'instagram_username': username}
+        if flags & HAS_PICTURE_PATH:
+            user['profile_pic_path'] = strings[path_offset:path_offset + path_length]
+        user['is_active_follower'] = True
+        if flags & HAS_STATS:
+            user['stats'] = {'hp': number(hp), 'strength': number(strength),
+                             'armor': number(armor), 'luck': number(luck)}
+        if flags & HAS_BONUSES:
+            attributes[username] = {hp_key: number(bonus_hp), forca_key: number(bonus_forca),
+                                    armadura_key: number(bonus_armadura), sorte_key: number(bonus_sorte)}
+        followers.append(user)
+    return followers, attributes
+
+
+def roster_is_current(header, sources):
+    """
+    True if no source changed since the roster was compiled. Sources whose
+    files were touched are re-hashed; `header` gets their new signatures.
+    """
+    signatures = sources.signatures()
+    for name in sources.files:
+        if signatures[name] == header['signatures'].get(name):
+            continue
+        try:
+            if sources.content_hash(name) != header['hashes'].get(name):
+                return False
+        except OSError:
+            return False
+        header['signatures'][name] = signatures[name]
+    return True
+
+
+def load_roster(roster_file=ROSTER_FILE, sources=None):
+    """
+    Active followers and the attribute table for a match, from the compiled
+    roster when it is current and intact, recompiling it otherwise. Raises like
+    reading users.json does (FileNotFoundError, json.JSONDecodeError) when
+    there is nothing to compile from.
+    """
+    sources = sources or RosterSources()
+
+    try:
+        with open(roster_file, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        data = None  # Missing or empty file
+
+    if data is not None:
+        roster = body = None
+        with data:
+            parsed = read_header(data)
+            if parsed is not None:
+                header, body_offset = parsed
+                try:
+                    signatures = json.dumps(header['signatures'])
+                    if roster_is_current(header, sources):
+                        roster = decode_roster(data, header, body_offset)
+                        if json.dumps(header['signatures']) != signatures:
+                            body = data[body_offset:]  # A copy - the map closes first
+                except (struct.error, IndexError, KeyError, TypeError, ValueError):
+                    roster = body = None  # Truncated or damaged - rebuild like a changed source
+        if body is not None:
+            # Touched but unchanged sources - remember their new signatures so
+            # the next launch takes the fast path. Only once the map is closed:
+            # Windows can't replace a file that is still mapped.
+            try:
+                write_roster(roster_file, header, body)
+            except OSError:
+                pass  # Only a shortcut - the next launch re-hashes instead
+        if roster is not None:
+            return roster
+
+    print("📦 Compilando roster...")
+    header = compile_roster(sources, roster_file)
+    with open(roster_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        _, body_offset = read_header(data)
+        return decode_roster(data, header, body_offset)
@@ -0,0 +1,277 @@
+"""
+Scraped Users Store
+scraped_users.db access for the scraper, kept free of selenium so it can
+be used (and benchmarked) without a browser.
+
+Re-scrapes are incremental: a freshly collected follower list is diffed
+against the database, and only followers whose picture is new or changed
+are downloaded. Followers who are gone are marked inactive, not deleted.
+
+Writes are buffered and upserted with executemany, one transaction per
+WRITE_BATCH rows (or per phase, via flush()), instead of a commit - and
+an fsync - per follower. users.json is streamed out of the database.
+"""
+
+import json
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+DB_PATH = 'scraped_users.db'
+
+# A collection this much smaller than the active list looks like an
+# interrupted scroll, not a wave of unfollows - don't deactivate anyone
+MIN_COVERAGE = 0.9
+
+# Unchanged pictures are still revalidated (a conditional request to the
+# same picture) once their last check is this old
+REVALIDATE_AFTER = timedelta(days=30)
+
+WRITE_BATCH = 1000
+READ_BATCH = 1000
+
+# One users.json entry as json.dump(..., indent=2) lays it out inside the
+# top-level list. Filling it in with compact json.dumps values goes
+# through the C encoder; indent=2 would use the pure-Python one.
+GAME_USER_ENTRY = '''  {
+    "instagram_username": %s,
+    "profile_pic_path": %s,
+    "profile_pic_url": %s,
+    "is_active_follower": %s,
+    "stats": {
+      "hp": %d,
+      "strength": %d,
+      "armor": %d,
+      "luck": %d
+    }
+  }'''
+
+SAVE_USER = '''
+    INSERT INTO users (username, profile_pic_url, profile_pic_path, scraped_at,
+                       has_picture, etag, last_modified, is_active, last_seen)
+    VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)
+    ON CONFLICT(username) DO UPDATE SET
+        profile_pic_url = excluded.profile_pic_url,
+        profile_pic_path = excluded.profile_pic_path,
+        scraped_at = excluded.scraped_at,
+        has_picture = excluded.has_picture,
+        etag = excluded.etag,
+        last_modified = excluded.last_modified,
+        is_active = 1,
+        last_seen = excluded.last_seen
+'''
+
+# Known users keep their stored picture URL - plan_refresh compares it
+# against the fresh one - and only get their place in the list updated
+SEE_USER = '''
+    INSERT INTO users (username, profile_pic_url, scraped_at, has_picture,
+                       is_active, last_seen, list_position)
+    VALUES (?, ?, ?, 0, 1, ?, ?)
+    ON CONFLICT(username) DO UPDATE SET
+        is_active = 1,
+        last_seen = excluded.last_seen,
+        list_position = excluded.list_position
+'''
+
+
+def picture_identity(url):
+    """
+    The part of a picture URL that names the picture. Instagram CDN URLs
+    carry signed, expiring query parameters that change on every scrape,
+    while the file name only changes when the picture does.
+    """
+    if not url:
+        return None
+    return os.path.basename(urlsplit(url).path) or url
+
+
+def checked_at(row):
+    """When a stored picture was last downloaded or revalidated"""
+    try:
+        return datetime.fromisoformat(row['scraped_at'])
+    except (TypeError, ValueError):
+        return datetime.min  # Never recorded
+
+
+def random_stats(username):
+    """Starting stats for the game, the same for a username on every scrape"""
+    rng = random.Random(username)
+    return {
+        'hp': rng.randint(80, 150),
+        'strength': rng.randint(2, 10),
+        'armor': rng.randint(1, 8),
+        'luck': rng.randint(1, 7)
+    }
+
+
+class ScrapedUserStore:
+    def __init__(self, db_path=DB_PATH):
+        self.conn = sqlite3.connect(db_path)
+        self.cursor = self.conn.cursor()
+        self.pending = []  # SAVE_USER rows not written yet
+        self.init_database()
+
+    def init_database(self):
+        """Create the users table, adding the incremental-scrape columns to older ones"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                profile_pic_url TEXT,
+                profile_pic_path TEXT,
+                scraped_at TIMESTAMP,
+                has_picture BOOLEAN
+            )
+        ''')
+
+        for definition in ('etag TEXT', 'last_modified TEXT',
+                           'is_active BOOLEAN DEFAULT 1', 'last_seen TIMESTAMP',
+                           'list_position INTEGER'):
+            try:
+                self.cursor.execute(f'ALTER TABLE users ADD COLUMN {definition}')
+            except sqlite3.OperationalError:
+                pass  # Column already exists
+        self.conn.commit()
+
+    def known_users(self):
+        """{username: row dict} for everyone ever scraped"""
+        self.flush()
+        self.cursor.execute('''
+            SELECT username, profile_pic_url, profile_pic_path, scraped_at, has_picture,
+                   etag, last_modified, is_active
+            FROM users
+        ''')
+        columns = [description[0] for description in self.cursor.description]
+        return {row[0]: dict(zip(columns, row)) for row in self.cursor.fetchall()}
+
+    def plan_refresh(self, followers, revalidate_after=REVALIDATE_AFTER):
+        """
+        Decide what a re-scrape has to download.
+
+        Returns (items, validators): [(username, url)] to fetch and
+        {username: (etag, last_modified)} for the ones asked conditionally.
+        Followers with a picture on disk get its path as profile_pic_path,
+        kept should a download fail. Changed pictures are downloaded in
+        full - validators only mean something for the picture they came
+        from - while unchanged ones are skipped, or revalidated once their
+        last check is older than `revalidate_after`.
+        """
+        known = self.known_users()
+        items = []
+        validators = {}
+        checked_before = datetime.now() - revalidate_after
+
+        for follower in followers:
+            username = follower['username']
+            url = follower.get('profile_pic_url')
+            if not url:
+                continue
+
+            row = known.get(username)
+            has_file = (row is not None and row['has_picture'] and row['profile_pic_path']
+                        and os.path.exists(row['profile_pic_path']))
+            if not has_file:
+                items.append((username, url))  # New follower or lost file
+                continue
+
+            follower['profile_pic_path'] = row['profile_pic_path']
+            if picture_identity(url) != picture_identity(row['profile_pic_url']):
+                items.append((username, url))  # New picture
+            elif (row['etag'] or row['last_modified']) and checked_at(row) < checked_before:
+                items.append((username, url))  # Same picture, due for a check
+                validators[username] = (row['etag'], row['last_modified'])
+        return items, validators
+
+    def save_user(self, username, pic_url=None, pic_path=None, etag=None, last_modified=None):
+        """Queue an insert or update of one user as active and just seen"""
+        now = datetime.now()
+        self.pending.append((username, pic_url, pic_path, now, bool(pic_path), etag, last_modified, now))
+        if len(self.pending) >= WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        """Write the queued users in one transaction"""
+        if not self.pending:
+            return
+        with self.conn:
+            self.cursor.executemany(SAVE_USER, self.pending)
+        self.pending = []
+
+    def sync_active(self, followers):
+        """
+        Record a freshly collected follower list: new followers are added,
+        everyone in it is marked active in list order and everyone else
+        inactive. Returns how many were deactivated, or None if the
+        collection looked incomplete and nobody was deactivated.
+        """
+        self.flush()
+        self.cursor.execute('SELECT COUNT(*) FROM users WHERE is_active')
+        active = self.cursor.fetchone()[0]
+        complete = len(followers) >= active * MIN_COVERAGE
+
+        now = datetime.now()
+        with self.conn:
+            self.cursor.executemany(SEE_USER, (
+                (follower['username'], follower.get('profile_pic_url'), now, now, position)
+                for position, follower in enumerate(followers)
+            ))
+            if not complete:
+                return None
+            self.cursor.execute('''
+                UPDATE users SET is_active = 0
+                WHERE is_active AND last_seen IS NOT ?
+            ''', (now,))
+            return self.cursor.rowcount
+
+    def iter_game_users(self):
+        """
+        users.json entries for the current followers in list order, read in
+        batches. Followers who left stay in the database only. Those without
+        a downloaded picture are kept - the game gives them the default avatar.
+        """
+        self.flush()
+        cursor = self.conn.execute('''
+            SELECT username, profile_pic_path, profile_pic_url, is_active
+            FROM users
+            WHERE is_active
+            ORDER BY list_position IS NULL, list_position, username
+        ''')
+        while True:
+            rows = cursor.fetchmany(READ_BATCH)
+            if not rows:
+                break
+            for username, pic_path, pic_url, is_active in rows:
+                yield {
+                    'instagram_username': username,
+                    'profile_pic_path': pic_path or f"profiles/{username}.png",
+                    'profile_pic_url': pic_url,
+                    'is_active_follower': bool(is_active),
+                    'stats': random_stats(username)
+                }
+
+    def export_users_json(self, path='users.json'):
+        """
+        Stream the users into `path` one entry at a time - same layout as
+        json.dump(..., indent=2). Written to a temp file and renamed, so
+        the game never reads half a roster. Returns the number of entries.
+        """
+        count = 0
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write('[')
+            for user in self.iter_game_users():
+                stats = user['stats']
+                f.write(',\n' if count else '\n')
+                f.write(GAME_USER_ENTRY % (
+                    json.dumps(user['instagram_username']), json.dumps(user['profile_pic_path']),
+                    json.dumps(user['profile_pic_url']), json.dumps(user['is_active_follower']),
+                    stats['hp'], stats['strength'], stats['armor'], stats['luck']))
+                count += 1
+            f.write('\n]' if count else ']')
+        os.replace(temp_path, path)
+        return count
+
+    def close(self):
+        self.flush()
+        self.conn.close()
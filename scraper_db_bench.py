@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Scraper Database Benchmark
+Times the scraper's SQLite writes and the users.json export on synthetic
+followers, next to the old commit-per-user loop and in-memory json.dump.
+
+Runs in a temp directory - scraped_users.db and users.json are not touched.
+
+Usage:
+    python scraper_db_bench.py --users 50000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from scraped_store import ScrapedUserStore, random_stats
+
+
+def synthetic_followers(count):
+    return [{
+        'username': f"follower_{n:06d}",
+        'profile_pic_url': f"https://cdn.example.com/v/{n}_n.jpg?oh={n * 7919:x}",
+    } for n in range(count)]
+
+
+def save_per_user(db_path, followers):
+    """The old save_user_to_db: INSERT OR REPLACE and a commit per follower"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            profile_pic_url TEXT,
+            profile_pic_path TEXT,
+            scraped_at TIMESTAMP,
+            has_picture BOOLEAN
+        )
+    ''')
+    conn.commit()
+    for follower in followers:
+        pic_path = f"profiles/{follower['username']}.jpg"
+        cursor.execute('''
+            INSERT OR REPLACE INTO users (username, profile_pic_url, profile_pic_path, scraped_at, has_picture)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (follower['username'], follower['profile_pic_url'], pic_path, datetime.now(), True))
+        conn.commit()
+    conn.close()
+
+
+def dump_in_memory(path, followers):
+    """The old save_data: the whole users.json built as a list, then dumped"""
+    game_data = [{
+        'instagram_username': follower['username'],
+        'profile_pic_path': f"profiles/{follower['username']}.jpg",
+        'profile_pic_url': follower['profile_pic_url'],
+        'is_active_follower': True,
+        'stats': random_stats(follower['username'])
+    } for follower in followers]
+    with open(path, 'w') as f:
+        json.dump(game_data, f, indent=2)
+
+
+def save_batched(db_path, followers):
+    store = ScrapedUserStore(db_path)
+    store.sync_active(followers)
+    for follower in followers:
+        store.save_user(follower['username'], follower['profile_pic_url'],
+                        f"profiles/{follower['username']}.jpg")
+    store.close()
+
+
+def export_streamed(db_path, path):
+    store = ScrapedUserStore(db_path)
+    store.export_users_json(path)
+    store.close()
+
+
+def measure(function, *args, memory=False):
+    """
+    (seconds, peak traced MB or None) of a call. tracemalloc slows Python
+    code down several times, so the peak comes from a second, traced run.
+    """
+    start = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - start
+    if not memory:
+        return seconds, None
+
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper database on synthetic followers")
+    parser.add_argument('--users', type=int, default=50000, help="synthetic followers")
+    parser.add_argument('--skip-old', action='store_true', help="don't time the commit-per-user loop")
+    args = parser.parse_args()
+
+    followers = synthetic_followers(args.users)
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"🗄️  {args.users} seguidores sintéticos em {directory}")
+        rows = []
+        if not args.skip_old:
+            rows.append(("commit por usuário (antigo)",
+                         measure(save_per_user, os.path.join(directory, 'old.db'), followers)))
+            rows.append(("users.json em memória (antigo)",
+                         measure(dump_in_memory, os.path.join(directory, 'old.json'), followers,
+                                 memory=True)))
+
+        db_path = os.path.join(directory, 'new.db')
+        rows.append(("executemany em lotes", measure(save_batched, db_path, followers)))
+        rows.append(("users.json do banco (stream)",
+                     measure(export_streamed, db_path, os.path.join(directory, 'new.json'), memory=True)))
+
+        for label, (seconds, peak_mb) in rows:
+            peak = f"pico {peak_mb:.1f} MB" if peak_mb is not None else ""
+            print(f"{label:<32} {seconds:>8.2f}s {args.users / seconds:>10.0f} usuários/s {peak}".rstrip())
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,524 @@
+"""
+Battle Simulation Engine
+Movement, wall bounces, collisions, combat and endgame rules with a
+fixed-timestep clock. Nothing here touches pygame or the display, so
+battles can also run headless (servers, batch runs, tests).
+"""
+
+import hashlib
+import json
+import math
+import random
+import sqlite3
+
+from spatial_grid import SpatialGrid
+
+# --- Constants ---
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+FPS = 60  # Simulation ticks per second
+TICK_MS = 1000 / FPS  # Simulated milliseconds per step
+SPRITE_SIZE = 40
+INITIAL_SIZE = 40
+SIZE_INCREMENT = 1  # Pixels to grow per death (very gradual)
+MAX_SIZE = 80  # Maximum size before speed boost kicks in (reduced)
+SPEED_INCREMENT = 0.02  # Speed multiplier increment after max size
+GRID_CELL_SIZE = MAX_SIZE + 20  # Broadphase cell - largest endgame diameter
+HIT_COOLDOWN_MS = 500  # Simulated milliseconds between hits from the same fighter
+
+
+def round_half_away(value):
+    """Round like pygame.Rect does when given float coordinates"""
+    magnitude = abs(value)
+    rounded = math.floor(magnitude)
+    if magnitude - rounded >= 0.5:
+        rounded += 1
+    return rounded if value >= 0 else -rounded
+
+
+NO_BONUSES = {'hp': 0, 'forca': 0, 'armadura': 0, 'sorte': 0}
+
+# player_attributes columns -> bonus keys used by Fighter (same as atributos.json)
+ATTRIBUTE_COLUMNS = (
+    ('bonus_hp', 'hp'),
+    ('bonus_strength', 'forca'),
+    ('bonus_armor', 'armadura'),
+    ('bonus_luck', 'sorte'),
+)
+
+
+def load_attribute_table(db_path='game_stats.db', json_path='atributos.json'):
+    """
+    Read every player's paid bonuses in one go: {username: bonuses}.
+
+    The player_attributes table in game_stats.db is the source of truth
+    (payments, AttributeManager, editar_atributos). atributos.json is only
+    a fallback for players the database doesn't know about.
+    """
+    table = {}
+    try:
+        with open(json_path, 'r') as f:
+            for username, bonuses in json.load(f).items():
+                table[username] = dict(NO_BONUSES, **bonuses)
+    except:
+        pass  # No JSON fallback
+
+    # Read-only URI so a missing database isn't created as an empty file
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            columns = ', '.join(column for column, _ in ATTRIBUTE_COLUMNS)
+            rows = conn.execute(f"SELECT username, {columns} FROM player_attributes").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        rows = []  # No database or no table yet
+
+    for username, *values in rows:
+        table[username] = {key: value or 0 for (_, key), value in zip(ATTRIBUTE_COLUMNS, values)}
+    return table
+
+
+def load_bonuses(username):
+    """Paid attribute bonuses for a single user - prefer load_attribute_table for rosters"""
+    return load_attribute_table().get(username, dict(NO_BONUSES))
+
+
+# --- Match Randomness ---
+class MatchRandom:
+    """
+    All the randomness of one match, derived from a single seed.
+
+    Separate streams keep subsystems from shifting each other's draws:
+    a rule change that adds a crit roll doesn't move every spawn point.
+        spawn   - starting positions and velocities
+        physics - min-speed kicks
+        combat  - critical hit rolls
+    """
+
+    STREAMS = ('spawn', 'physics', 'combat')
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.seed = seed
+        for name in self.STREAMS:
+            setattr(self, name, random.Random(self.sub_seed(name)))
+
+    def sub_seed(self, name):
+        """Stable 64-bit seed for a named sub-stream (also usable by NumPy)"""
+        digest = hashlib.sha256(f"{self.seed}:{name}".encode()).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+
+# --- The Combatant State ---
+# Physics and combat state for one follower, without any rendering.
+class Fighter:
+    def __init__(self, user_data, rng=None, attributes=None):
+        # Fighters of the same match share one MatchRandom and one
+        # preloaded attribute table (see load_attribute_table)
+        self.rng = rng if rng is not None else MatchRandom()
+        self.username = user_data.get("instagram_username", "Unknown")
+        self.current_size = INITIAL_SIZE
+        self.radius = self.current_size // 2  # For circular collision
+        self.speed_multiplier = 1.0
+
+        # Physics properties - floating point position and velocity
+        spawn = self.rng.spawn
+        self.x = float(spawn.randint(SPRITE_SIZE, SCREEN_WIDTH - SPRITE_SIZE))
+        self.y = float(spawn.randint(SPRITE_SIZE, SCREEN_HEIGHT - SPRITE_SIZE))
+
+        # Random initial velocity
+        angle = spawn.uniform(0, 2 * math.pi)
+        speed = spawn.uniform(2, 4)  # Increased base speed
+        self.vx = speed * math.cos(angle)
+        self.vy = speed * math.sin(angle)
+
+        # Combat attributes - paid bonuses
+        if attributes is None:
+            bonuses = load_bonuses(self.username)
+        else:
+            bonuses = attributes.get(self.username, NO_BONUSES)
+
+        # Base values
+        base_hp = 100
+        base_damage = 5
+
+        # Each attribute point = 1% bonus
+        self.hp_bonus = bonuses.get('hp', 0)
+        self.damage_bonus = bonuses.get('forca', 0)
+        self.armor_bonus = bonuses.get('armadura', 0)
+        self.luck_bonus = bonuses.get('sorte', 0)
+
+        # Apply percentage bonuses
+        self.hp = int(base_hp * (1 + self.hp_bonus / 100))  # +1% per point
+        self.max_hp = self.hp
+        self.damage = base_damage * (1 + self.damage_bonus / 100)  # +1% per point
+
+        # Armor reduces incoming damage by percentage (max 50% reduction)
+        self.armor_reduction = min(0.5, self.armor_bonus / 100)  # 1% reduction per point, max 50%
+
+        # Luck is chance for critical hit (max 50% chance)
+        self.luck = min(0.5, self.luck_bonus / 100)  # 1% crit chance per point, max 50%
+
+        # Cooldown to prevent instant multiple hits (simulated clock)
+        self.last_hit_time = -math.inf  # Never hit anyone yet
+        self.hit_cooldown = HIT_COOLDOWN_MS
+
+    @property
+    def has_bonuses(self):
+        return self.hp_bonus > 0 or self.damage_bonus > 0 or self.armor_bonus > 0 or self.luck_bonus > 0
+
+    def speed(self):
+        return math.sqrt(self.vx * self.vx + self.vy * self.vy)
+
+    def scale_velocity(self, length):
+        """Rescale velocity to the given length, keeping its direction"""
+        current = self.speed()
+        if current == 0:
+            return  # No direction to keep - the min-speed kick will handle it
+        factor = length / current
+        self.vx *= factor
+        self.vy *= factor
+
+    def update_size_and_speed(self, total_deaths):
+        """Update size based on deaths, then speed if at max size"""
+        # Logarithmic growth for smoother progression
+        if total_deaths == 0:
+            self.current_size = INITIAL_SIZE
+        else:
+            # Use logarithmic scale for smoother growth
+            growth_factor = math.log(total_deaths + 1) * 8  # Adjust multiplier for desired growth rate
+            new_size = INITIAL_SIZE + growth_factor
+
+            if new_size <= MAX_SIZE:
+                # Still growing in size
+                self.current_size = int(new_size)
+                self.radius = self.current_size // 2
+            else:
+                # Max size reached, increase speed instead
+                self.current_size = MAX_SIZE
+                self.radius = self.current_size // 2
+
+                # Calculate extra deaths beyond size limit
+                extra_deaths = total_deaths - 30  # Approximate deaths to reach max size
+                if extra_deaths > 0:
+                    self.speed_multiplier = 1.0 + (extra_deaths * SPEED_INCREMENT)
+
+                    # Cap speed multiplier
+                    if self.speed_multiplier > 3.0:
+                        self.speed_multiplier = 3.0
+
+    def update(self):
+        # --- Simple Movement and Physics with speed multiplier ---
+        self.x += self.vx * self.speed_multiplier
+        self.y += self.vy * self.speed_multiplier
+
+        # Bounding box of the sprite, snapped to whole pixels like a pygame Rect
+        size = int(self.current_size)
+        left = round_half_away(self.x) - size // 2
+        top = round_half_away(self.y) - size // 2
+
+        # Wall collision detection - perfect elastic collision
+        hit_wall = False
+        if left <= 0 or left + size >= SCREEN_WIDTH:
+            self.vx = -self.vx
+            hit_wall = True
+            # Keep sprite in bounds
+            left = 0 if left <= 0 else SCREEN_WIDTH - size
+            self.x = float(left + size // 2)
+
+        if top <= 0 or top + size >= SCREEN_HEIGHT:
+            self.vy = -self.vy
+            hit_wall = True
+            # Keep sprite in bounds
+            top = 0 if top <= 0 else SCREEN_HEIGHT - size
+            self.y = float(top + size // 2)
+
+        # Speed boost on wall hit after max size
+        if hit_wall and self.current_size >= MAX_SIZE:
+            self.speed_multiplier *= 1.01
+            if self.speed_multiplier > 3.0:
+                self.speed_multiplier = 3.0
+
+        # Keep minimum speed to prevent stopping
+        if self.speed() < 2.0:  # Increased minimum
+            # If too slow, give it a stronger push
+            angle = self.rng.physics.uniform(0, 2 * math.pi)
+            speed = 3.0  # Good base speed
+            self.vx = speed * math.cos(angle)
+            self.vy = speed * math.sin(angle)
+
+        # Cap maximum velocity (before multiplier) - increased for better gameplay
+        if self.speed() > 10:
+            self.scale_velocity(10)
+
+    def distance_to(self, other):
+        dx = self.x - other.x
+        dy = self.y - other.y
+        return math.sqrt(dx * dx + dy * dy)
+
+    def collide_with(self, other):
+        """Handle collision with another fighter"""
+        # Calculate distance between centers
+        distance = self.distance_to(other)
+
+        # Check if actually colliding (circles touching)
+        if distance < (self.radius + other.radius) and distance > 0:
+            # Perfect elastic collision for circles
+            # Calculate collision normal
+            nx = other.x - self.x
+            ny = other.y - self.y
+            length = math.sqrt(nx * nx + ny * ny)
+            nx /= length
+            ny /= length
+
+            # Speed along collision normal (relative velocity . normal)
+            speed = (self.vx - other.vx) * nx + (self.vy - other.vy) * ny
+
+            # Do not resolve if velocities are separating
+            if speed < 0:
+                return
+
+            # Calculate new velocities (elastic collision)
+            self.vx -= nx * speed
+            self.vy -= ny * speed
+            other.vx += nx * speed
+            other.vy += ny * speed
+
+            # Ensure minimum speed after collision (higher minimum for endgame)
+            min_speed = 3.0 if self.current_size > MAX_SIZE else 2.0
+            if self.speed() < min_speed:
+                self.scale_velocity(min_speed)
+            if other.speed() < min_speed:
+                other.scale_velocity(min_speed)
+
+            # Speed boost on collision after max size
+            if self.current_size >= MAX_SIZE:
+                self.speed_multiplier *= 1.005
+                if self.speed_multiplier > 3.0:
+                    self.speed_multiplier = 3.0
+
+            # Separate circles to prevent overlap
+            overlap = (self.radius + other.radius) - distance
+            push = overlap / 2 + 1
+            self.x -= nx * push
+            self.y -= ny * push
+            other.x += nx * push
+            other.y += ny * push
+
+    def deal_damage(self, other, now, is_final_two=False):
+        """
+        Deal damage during collision.
+        Returns (damage, critical) or None while the hit is on cooldown.
+        """
+        if now - self.last_hit_time <= self.hit_cooldown:
+            return None
+        self.last_hit_time = now
+
+        # Start with calculated damage
+        damage = self.damage
+        critical = False
+
+        # Apply luck for critical hits (based on new percentage system)
+        if self.luck > 0 and self.rng.combat.random() < self.luck:
+            damage = damage * 2
+            critical = True
+
+        # Apply armor reduction (percentage-based, not flat reduction)
+        if other.armor_reduction > 0:
+            damage = damage * (1 - other.armor_reduction)
+
+        # Ensure minimum damage of 1
+        damage = max(1, damage)
+
+        # ANTI-DRAW SYSTEM: In final 2, ensure no draws
+        if is_final_two:
+            # If both would die from normal damage, the one with more HP wins
+            if self.hp <= damage and other.hp <= damage:
+                # Prevent double death - higher HP survives
+                if self.hp > other.hp:
+                    # I have more HP, kill the other
+                    damage = other.hp + 1
+                else:
+                    # Other has more HP, don't kill them but deal some damage
+                    damage = max(1, min(damage, other.hp - 1))
+            elif other.hp <= damage:
+                # Ensure they die
+                damage = other.hp + 1
+
+        # Apply damage
+        other.hp -= damage
+        return damage, critical
+
+
+# --- The Simulation ---
+class BattleSimulation:
+    """
+    Runs a battle one fixed tick at a time.
+
+    Optional callbacks let a front-end react to combat without the engine
+    knowing about it:
+        on_hit(attacker, victim, damage, critical)
+        on_kill(killer, victim)
+    """
+
+    def __init__(self, fighters, on_hit=None, on_kill=None):
+        self.fighters = list(fighters)
+        self.initial_count = len(self.fighters)
+        self.on_hit = on_hit
+        self.on_kill = on_kill
+
+        self.tick = 0
+        self.time_ms = 0.0
+        self.total_deaths = 0
+        self.finished = False
+        self.winner = None  # Last fighter standing, None on a draw
+        self.grid = SpatialGrid(GRID_CELL_SIZE)
+
+    def apply_endgame(self, survivors):
+        """Boost growth and speed when few survivors remain"""
+        for fighter in self.fighters:
+            # Extra growth for final survivors
+            if fighter.current_size < MAX_SIZE + 20:  # Allow extra growth in endgame
+                fighter.current_size = min(fighter.current_size + 0.5, MAX_SIZE + 20)
+                fighter.radius = fighter.current_size // 2
+
+            # Speed boost for final survivors
+            if survivors <= 3:
+                fighter.speed_multiplier = min(fighter.speed_multiplier * 1.002, 4.0)
+                # Ensure minimum velocity to prevent getting stuck
+                if fighter.speed() < 3.0:
+                    fighter.scale_velocity(3.0)
+
+                # Push away from corners to prevent getting stuck
+                corner_threshold = 150
+                center_x, center_y = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
+
+                # If too close to corners, apply force toward center
+                if (fighter.x < corner_threshold or fighter.x > SCREEN_WIDTH - corner_threshold) and \
+                   (fighter.y < corner_threshold or fighter.y > SCREEN_HEIGHT - corner_threshold):
+                    # Vector pointing to center
+                    dx = center_x - fighter.x
+                    dy = center_y - fighter.y
+                    length = math.sqrt(dx * dx + dy * dy)
+                    if length > 0:
+                        # Add gentle push toward center
+                        fighter.vx += dx / length * 0.5
+                        fighter.vy += dy / length * 0.5
+
+    def attack(self, attacker, victim, is_final_two):
+        """Resolve one hit - returns True if the victim dies"""
+        result = attacker.deal_damage(victim, self.time_ms, is_final_two)
+        if result is None:
+            return False
+
+        damage, critical = result
+        if self.on_hit:
+            self.on_hit(attacker, victim, damage, critical)
+
+        # Elimination check
+        if victim.hp <= 0:
+            if self.on_kill:
+                self.on_kill(attacker, victim)
+            return True
+        return False
+
+    def resolve_collisions(self, is_final_two):
+        """Collide and fight every touching pair - returns fighters to remove"""
+        fighters = self.fighters
+        to_remove = []
+
+        def fighter_position(index):
+            fighter = fighters[index]
+            return (fighter.x, fighter.y)
+
+        # Cells only need to be as wide as the biggest fighter right now
+        if fighters:
+            self.grid.cell_size = 2 * max(fighter.radius for fighter in fighters)
+
+        # Broadphase - candidate pairs come back in the same order as a full scan
+        for i, j in self.grid.pairs(len(fighters), fighter_position):
+            fighter1 = fighters[i]
+            fighter2 = fighters[j]
+
+            # Check circular collision
+            if fighter1.distance_to(fighter2) < (fighter1.radius + fighter2.radius):
+                # Handle physics collision
+                fighter1.collide_with(fighter2)
+
+                # Handle combat - check for simultaneous death prevention
+                if is_final_two:
+                    # In final 2, only one can die per collision
+                    if self.attack(fighter1, fighter2, is_final_two):
+                        to_remove.append(fighter2)
+                    elif self.attack(fighter2, fighter1, is_final_two):
+                        to_remove.append(fighter1)
+                else:
+                    # Normal combat for more than 2 players
+                    if self.attack(fighter1, fighter2, is_final_two):
+                        to_remove.append(fighter2)
+                    if self.attack(fighter2, fighter1, is_final_two):
+                        to_remove.append(fighter1)
+
+        return to_remove
+
+    def step(self):
+        """
+        Advance the battle by one fixed tick.
+        Returns the fighters eliminated during this tick.
+        """
+        if self.finished:
+            return []
+
+        # Update all fighters
+        for fighter in self.fighters:
+            fighter.update()
+
+        survivors = len(self.fighters)
+        is_final_two = (survivors == 2)  # Check if we're down to final 2
+
+        if survivors <= 5 and survivors > 1:
+            self.apply_endgame(survivors)
+
+        to_remove = self.resolve_collisions(is_final_two)
+
+        # Remove dead fighters and update all survivors
+        eliminated = []
+        if to_remove:
+            # A fighter can be "killed" more than once in the same tick
+            eliminated = list(dict.fromkeys(to_remove))
+            dead = set(eliminated)
+            self.fighters = [fighter for fighter in self.fighters if fighter not in dead]
+            self.total_deaths += len(eliminated)
+
+            # Update size and speed for all remaining fighters
+            for fighter in self.fighters:
+                fighter.update_size_and_speed(self.total_deaths)
+
+        # Check for winner
+        if len(self.fighters) == 1:
+            self.finished = True
+            self.winner = self.fighters[0]
+        elif not self.fighters:
+            self.finished = True  # Everyone died - draw
+
+        self.tick += 1
+        self.time_ms = self.tick * TICK_MS
+        return eliminated
+
+    def run(self, max_ticks=None):
+        """Step until the battle ends (or max_ticks pass) - returns the winner"""
+        while not self.finished and (max_ticks is None or self.tick < max_ticks):
+            self.step()
+        return self.winner
+
+
+def run_headless(users_data, max_ticks=None, seed=None):
+    """Build fighters from users.json-style data and run a battle without a screen"""
+    rng = MatchRandom(seed)
+    attributes = load_attribute_table()
+    fighters = [Fighter(user, rng, attributes) for user in users_data if user.get("is_active_follower")]
+    simulation = BattleSimulation(fighters)
+    simulation.run(max_ticks)
+    return simulation
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Simulation Engine Benchmark
+Times one seeded arena per fighter count in each engine and reports
+seconds per tick:
+
+    objects   simulation.BattleSimulation
+    exact     VectorizedSimulation (the game's rules, pair loop)
+    batched   VectorizedSimulation(batched=True) (approximate contacts)
+
+The exact engine is also checked against the object engine, fighter by
+fighter, after the timed ticks.
+
+Synthetic fighters, no attribute bonuses - game_stats.db is not read.
+
+Usage:
+    python simulation_bench.py --players 1000 10000 --ticks 3
+"""
+
+import argparse
+import time
+
+from simulation import BattleSimulation, Fighter, MatchRandom
+from vector_simulation import VectorizedSimulation
+
+STATE = ('x', 'y', 'vx', 'vy', 'hp')
+
+
+def time_engine(engine, players, ticks, seed, **options):
+    """Seconds per tick and final fighter state of one seeded arena"""
+    rng = MatchRandom(seed)
+    users = [{'instagram_username': f"fighter_{n:05d}"} for n in range(players)]
+    fighters = [Fighter(user, rng, attributes={}) for user in users]
+    simulation = engine(fighters, **options)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        simulation.step()
+    seconds = (time.perf_counter() - start) / ticks
+
+    if hasattr(simulation, 'sync_fighters'):
+        simulation.sync_fighters()
+    state = [(fighter.username, *(getattr(fighter, name) for name in STATE))
+             for fighter in simulation.fighters]
+    return seconds, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure seconds per tick of each simulation engine")
+    parser.add_argument('--players', type=int, nargs='+', default=[1000, 10000], help="fighter counts to try")
+    parser.add_argument('--ticks', type=int, default=3, help="ticks timed per engine")
+    parser.add_argument('--seed', type=int, default=0, help="match seed")
+    args = parser.parse_args()
+
+    engines = (
+        ('objetos', BattleSimulation, {}),
+        ('exato', VectorizedSimulation, {}),
+        ('batched', VectorizedSimulation, {'batched': True}),
+    )
+
+    print(f"🎲 {args.ticks} ticks por motor, seed {args.seed}")
+    for players in args.players:
+        print(f"\n{players} lutadores")
+        reference = None
+        for name, engine, options in engines:
+            seconds, state = time_engine(engine, players, args.ticks, args.seed, **options)
+            status = ""
+            if reference is None:
+                reference = state
+            elif not options:
+                status = "✅" if state == reference else "❌ estado diferente do motor de objetos"
+            print(f"  {name:<8} {seconds:>8.3f} s/tick {status}")
+
+
+if __name__ == "__main__":
+    main()
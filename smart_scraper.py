@@ -7,9 +7,6 @@ Scrolls first to load everything, then collects data
 import json
 import time
 import random
-import os
-import requests
-import sqlite3
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -19,6 +16,85 @@ from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.keys import Keys
 
+from picture_downloader import PictureDownloader
+from scraped_store import ScrapedUserStore
+
+# Extracts every loaded follower inside the browser, in one WebDriver round
+# trip instead of several per link. Same rules as the old per-element loop:
+# profile links first, with the picture from the closest of 5 ancestors that
+# has one, then username-looking button/span texts if that found too few.
+COLLECT_FOLLOWERS_SCRIPT = '''
+    var dialog = arguments[0];
+    var maxCollect = arguments[1];
+    var links = dialog.querySelectorAll("a[href*='/']");
+    var buttons = dialog.querySelectorAll("div[role='button']");
+    var spans = dialog.querySelectorAll("span[class*='_ap3a']");
+    var followers = [];
+    var seen = new Set();
+
+    function isPicture(src) {
+        return src && src.indexOf('blank.gif') === -1 &&
+            (src.indexOf('/v/') !== -1 || src.indexOf('scontent') !== -1);
+    }
+
+    for (var i = 0; i < links.length; i++) {
+        var href = links[i].href;
+        if (!href || href.indexOf('/p/') !== -1 || href.indexOf('/explore') !== -1 ||
+                href.indexOf('/reels') !== -1) {
+            continue;
+        }
+        var parts = href.replace(/\\/+$/, '').split('/');
+        var username = parts[parts.length - 1];
+        if (parts.length < 4 || username.length < 2 || seen.has(username)) {
+            continue;
+        }
+        seen.add(username);
+
+        var pic = null;
+        var parent = links[i];
+        for (var level = 0; level < 5 && !pic && parent.parentElement; level++) {
+            parent = parent.parentElement;
+            var imgs = parent.querySelectorAll('img');
+            for (var j = 0; j < imgs.length; j++) {
+                if (isPicture(imgs[j].src)) {
+                    pic = imgs[j].src;
+                    break;
+                }
+            }
+        }
+        followers.push({username: username, profile_pic_url: pic});
+    }
+
+    if (followers.length < (maxCollect || 100)) {
+        var texts = Array.prototype.slice.call(buttons).concat(Array.prototype.slice.call(spans));
+        for (var k = 0; k < texts.length; k++) {
+            var text = (texts[k].innerText || '').trim();
+            var lower = text.toLowerCase();
+            if (text.length < 2 || seen.has(text) || lower.indexOf('follow') !== -1 ||
+                    lower.indexOf('remove') !== -1 || lower.indexOf('message') !== -1) {
+                continue;
+            }
+            seen.add(text);
+
+            // Picture: first image under the second closest div ancestor
+            var container = texts[k].parentElement;
+            for (var divs = 0; container; container = container.parentElement) {
+                if (container.tagName === 'DIV' && ++divs === 2) {
+                    break;
+                }
+            }
+            var img = container && container.querySelector('img');
+            followers.push({username: text, profile_pic_url: img ? img.src : null});
+
+            if (maxCollect && followers.length >= maxCollect) {
+                break;
+            }
+        }
+    }
+
+    return {links: links.length, buttons: buttons.length, spans: spans.length, followers: followers};
+'''
+
 class SmartInstagramScraper:
     """Scraper that pre-loads followers before collecting"""
     
@@ -30,34 +106,20 @@ class SmartInstagramScraper:
     
     def init_database(self):
         """Initialize SQLite database to track scraped users"""
-        self.conn = sqlite3.connect('scraped_users.db')
-        self.cursor = self.conn.cursor()
-        
-        # Create table if not exists
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                username TEXT PRIMARY KEY,
-                profile_pic_url TEXT,
-                profile_pic_path TEXT,
-                scraped_at TIMESTAMP,
-                has_picture BOOLEAN
-            )
-        ''')
-        self.conn.commit()
+        self.store = ScrapedUserStore()
+        self.conn = self.store.conn
+        self.cursor = self.store.cursor
     
     def is_user_scraped(self, username):
         """Check if user is already in database"""
+        self.store.flush()
         self.cursor.execute('SELECT has_picture FROM users WHERE username = ?', (username,))
         result = self.cursor.fetchone()
         return result is not None and result[0] == 1  # Return True only if we have the picture
     
-    def save_user_to_db(self, username, pic_url=None, pic_path=None):
-        """Save or update user in database"""
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO users (username, profile_pic_url, profile_pic_path, scraped_at, has_picture)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (username, pic_url, pic_path, datetime.now(), bool(pic_path)))
-        self.conn.commit()
+    def save_user_to_db(self, username, pic_url=None, pic_path=None, etag=None, last_modified=None):
+        """Save or update user in database (buffered - written in batches)"""
+        self.store.save_user(username, pic_url, pic_path, etag, last_modified)
     
     def setup_browser(self):
         """Setup Chrome with stealth settings"""
@@ -205,110 +267,16 @@ class SmartInstagramScraper:
         
         time.sleep(2)
         
-        followers_collected = []
-        usernames_seen = set()
-        
-        # Find ALL follower elements using multiple strategies
-        all_elements = []
-        
-        # Strategy 1: Find all links
-        links = dialog.find_elements(By.XPATH, ".//a[contains(@href, '/')]")
-        all_elements.extend(links)
-        
-        # Strategy 2: Find divs with role=button (Instagram uses these)
-        buttons = dialog.find_elements(By.XPATH, ".//div[@role='button']")
+        # Everything is read in the browser - one round trip for all followers
+        result = self.driver.execute_script(COLLECT_FOLLOWERS_SCRIPT, dialog, max_collect)
+        followers_collected = result['followers']
         
-        # Strategy 3: Find spans that might contain usernames
-        spans = dialog.find_elements(By.XPATH, ".//span[contains(@class, '_ap3a')]")
+        print(f"📋 Found {result['links']} links, {result['buttons']} buttons, {result['spans']} spans")
         
-        print(f"📋 Found {len(links)} links, {len(buttons)} buttons, {len(spans)} spans")
-        
-        # Process each link with its corresponding image
-        for element in links:
-            try:
-                href = element.get_attribute('href')
-                
-                if not href or '/p/' in href or '/explore' in href or '/reels' in href:
-                    continue
-                
-                # Extract username from URL
-                parts = href.rstrip('/').split('/')
-                if len(parts) < 4:
-                    continue
-                    
-                username = parts[-1]
-                
-                # Skip invalid or duplicate
-                if not username or username in usernames_seen or len(username) < 2:
-                    continue
-                
-                usernames_seen.add(username)
-                
-                # Find the image directly associated with this link
-                profile_pic = None
-                try:
-                    # Find the closest parent container that has both link and image
-                    parent = element
-                    for _ in range(5):  # Try up to 5 parent levels
-                        parent = parent.find_element(By.XPATH, '..')
-                        imgs = parent.find_elements(By.TAG_NAME, 'img')
-                        for img in imgs:
-                            src = img.get_attribute('src')
-                            if src and 'blank.gif' not in src and ('/v/' in src or 'scontent' in src):
-                                profile_pic = src
-                                break
-                        if profile_pic:
-                            break
-                except:
-                    pass
-                
-                # Add to collection
-                followers_collected.append({
-                    'username': username,
-                    'profile_pic_url': profile_pic
-                })
-                
-                # Show unique URL indicator
-                url_preview = profile_pic[:50] + "..." if profile_pic else "No image"
-                print(f"✅ {len(followers_collected):3d}: {username} - {url_preview}")
-                
-                # Don't break early - continue collecting ALL followers
-                # We'll limit later if needed
-                    
-            except Exception as e:
-                continue
-        
-        # If we don't have enough, try processing buttons/spans
-        if len(followers_collected) < (max_collect or 100):
-            for element in buttons + spans:
-                try:
-                    text = element.text.strip()
-                    if text and len(text) > 1 and text not in usernames_seen:
-                        # Check if it looks like a username
-                        if not any(word in text.lower() for word in ['follow', 'following', 'remove', 'message']):
-                            usernames_seen.add(text)
-                            
-                            # Try to find associated image
-                            profile_pic = None
-                            try:
-                                parent = element.find_element(By.XPATH, './ancestor::div[2]')
-                                img = parent.find_element(By.XPATH, './/img')
-                                profile_pic = img.get_attribute('src')
-                            except:
-                                pass
-                            
-                            followers_collected.append({
-                                'username': text,
-                                'profile_pic_url': profile_pic
-                            })
-                            
-                            print(f"✅ {len(followers_collected):3d}: {text}")
-                            
-                            if max_collect and len(followers_collected) >= max_collect:
-                                break
-                                
-                except:
-                    continue
+        for index, follower in enumerate(followers_collected, 1):
+            profile_pic = follower['profile_pic_url']
+            url_preview = profile_pic[:50] + "..." if profile_pic else "No image"
+            print(f"✅ {index:3d}: {follower['username']} - {url_preview}")
         
         # Quick pause if we collected a lot
         if len(followers_collected) > 50 and len(followers_collected) % 50 == 0:
@@ -364,6 +332,13 @@ class SmartInstagramScraper:
             followers = self.collect_loaded_followers(dialog, None)
             
             self.followers_data = followers
+            
+            # Followers who are gone stay in the database, marked inactive
+            deactivated = self.store.sync_active(followers)
+            if deactivated is None:
+                print("⚠️ Collected list looks incomplete - not marking anyone inactive")
+            elif deactivated:
+                print(f"👋 {deactivated} followers no longer follow - marked inactive")
             return followers
             
         except Exception as e:
@@ -371,51 +346,46 @@ class SmartInstagramScraper:
             return []
     
     def download_profile_pictures(self):
-        """Download profile pictures with delays"""
+        """Download new and changed profile pictures in parallel (rate limited per host)"""
         if not self.followers_data:
             print("No followers to download pictures for")
             return
         
-        print(f"\n📸 Downloading {len(self.followers_data)} profile pictures...")
-        os.makedirs("profiles", exist_ok=True)
+        # Only new followers and changed pictures - the rest are already on disk,
+        # with an occasional conditional check
+        items, validators = self.store.plan_refresh(self.followers_data)
+        skipped = sum(1 for follower in self.followers_data if follower.get('profile_pic_url')) - len(items)
+        print(f"\n📸 Downloading {len(items) - len(validators)} profile pictures, revalidating "
+              f"{len(validators)} ({skipped} unchanged, skipped)...")
         
+        by_username = {follower['username']: follower for follower in self.followers_data}
         downloaded = 0
-        batch_size = 10
+        not_modified = 0
+        
+        def on_result(username, result):
+            nonlocal downloaded, not_modified
+            follower = by_username[username]
+            if result:
+                follower['profile_pic_path'] = result['path']
+                if result['changed']:
+                    downloaded += 1
+                    print(f"  ✅ {downloaded}/{len(items)}: {username}")
+                else:
+                    not_modified += 1
+                # Save to database (results arrive on this thread)
+                self.save_user_to_db(username, follower['profile_pic_url'], result['path'],
+                                     result['etag'], result['last_modified'])
+            else:
+                print(f"  ❌ Failed: {username}")
         
-        for i, follower in enumerate(self.followers_data):
-            username = follower['username']
-            pic_url = follower.get('profile_pic_url')
-            
-            if pic_url:
-                try:
-                    # Download image
-                    response = requests.get(pic_url, timeout=10)
-                    if response.status_code == 200:
-                        filepath = f"profiles/{username}.jpg"
-                        with open(filepath, 'wb') as f:
-                            f.write(response.content)
-                        
-                        follower['profile_pic_path'] = filepath
-                        downloaded += 1
-                        print(f"  ✅ {downloaded}/{len(self.followers_data)}: {username}")
-                        
-                        # Save to database
-                        self.save_user_to_db(username, pic_url, filepath)
-                    
-                    # Very quick delay
-                    time.sleep(random.uniform(0.1, 0.3))  # Much faster!
-                    
-                except Exception as e:
-                    print(f"  ❌ Failed: {username}")
-                    follower['profile_pic_path'] = None
-            
-            # Quick break every batch
-            if (i + 1) % batch_size == 0:
-                pause = random.uniform(0.5, 1.0)  # Faster!
-                print(f"  ⏸️ Quick batch pause...")
-                time.sleep(pause)
+        downloader = PictureDownloader()
+        try:
+            downloader.download_all(items, on_result, validators)
+        finally:
+            downloader.close()
+            self.store.flush()
         
-        print(f"✅ Downloaded {downloaded} pictures")
+        print(f"✅ Downloaded {downloaded} pictures ({not_modified} not modified)")
     
     def save_data(self):
         """Save to JSON files"""
@@ -431,36 +401,17 @@ class SmartInstagramScraper:
         with open('followers_data.json', 'w') as f:
             json.dump(output, f, indent=2)
         
-        # Save game format
-        game_data = []
-        for follower in self.followers_data:
-            # Generate random stats
-            random.seed(follower['username'])
-            
-            game_data.append({
-                'instagram_username': follower['username'],
-                'profile_pic_path': follower.get('profile_pic_path', f"profiles/{follower['username']}.png"),
-                'profile_pic_url': follower.get('profile_pic_url'),
-                'is_active_follower': True,
-                'stats': {
-                    'hp': random.randint(80, 150),
-                    'strength': random.randint(2, 10),
-                    'armor': random.randint(1, 8),
-                    'luck': random.randint(1, 7)
-                }
-            })
-        
-        with open('users.json', 'w') as f:
-            json.dump(game_data, f, indent=2)
+        # Save game format, streamed from the database - current followers only
+        exported = self.store.export_users_json('users.json')
         
-        print(f"✅ Saved {len(self.followers_data)} followers to JSON files")
+        print(f"✅ Saved {len(self.followers_data)} followers to JSON files ({exported} in users.json)")
     
     def cleanup(self):
         """Close browser and database"""
         if self.driver:
             self.driver.quit()
-        if hasattr(self, 'conn'):
-            self.conn.close()
+        if hasattr(self, 'store'):
+            self.store.close()
         print("✅ Browser closed")
 
 def main():
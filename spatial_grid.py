@@ -0,0 +1,99 @@
+"""
+Spatial Hash Broadphase
+Uniform grid that finds nearby fighter pairs without testing every pair
+"""
+
+
+class SpatialGrid:
+    """Buckets fighter indices by grid cell so only neighbours are compared"""
+
+    def __init__(self, cell_size):
+        # Cell size must be at least the largest possible sum of two radii,
+        # so anything that can touch is always in one of the 9 cells around us
+        self.cell_size = cell_size
+        self.cells = {}
+        self.cell_of = []
+
+    def cell_key(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def rebuild(self, positions):
+        """Re-bucket every fighter from an iterable of (x, y) positions"""
+        self.cells = {}
+        self.cell_of = []
+
+        for index, (x, y) in enumerate(positions):
+            key = self.cell_key(x, y)
+            self.cell_of.append(key)
+            bucket = self.cells.get(key)
+            if bucket is None:
+                self.cells[key] = [index]
+            else:
+                bucket.append(index)
+
+    def move(self, index, x, y):
+        """Move a fighter to the bucket of its new position"""
+        key = self.cell_key(x, y)
+        old_key = self.cell_of[index]
+        if key == old_key:
+            return
+
+        self.cells[old_key].remove(index)
+        self.cell_of[index] = key
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [index]
+        else:
+            bucket.append(index)
+
+    def neighbours_after(self, x, y, after):
+        """Sorted indices greater than `after` in the 3x3 cells around (x, y)"""
+        cell_x, cell_y = self.cell_key(x, y)
+        found = []
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                bucket = self.cells.get((cell_x + dx, cell_y + dy))
+                if bucket:
+                    found.extend(j for j in bucket if j > after)
+
+        found.sort()
+        return found
+
+    def pairs(self, count, position):
+        """
+        Yield candidate (i, j) pairs in the same order as the old
+        `for i / for j` loop over every pair.
+
+        `position(index)` must return the current (x, y) of a fighter. The
+        caller is free to push i and j apart between yields - moved fighters
+        are re-bucketed and the search continues from i's new position, so
+        every pair the full scan would have found is still produced.
+        """
+        self.rebuild(position(index) for index in range(count))
+
+        for i in range(count):
+            x, y = position(i)
+            candidates = self.neighbours_after(x, y, i)
+            k = 0
+
+            while k < len(candidates):
+                j = candidates[k]
+                k += 1
+                other = position(j)
+
+                yield i, j
+
+                new_position = position(i)
+                new_other = position(j)
+                if new_position != (x, y) or new_other != other:
+                    self.move(j, *new_other)
+                    old_cell = self.cell_of[i]
+                    self.move(i, *new_position)
+                    x, y = new_position
+
+                    # Still in the same cell means the same 3x3 block, and
+                    # only i and j moved, so the remaining candidates hold
+                    if self.cell_of[i] != old_cell:
+                        candidates = self.neighbours_after(x, y, j)
+                        k = 0
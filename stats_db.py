@@ -0,0 +1,215 @@
+"""
+Game Stats Database
+One place that opens game_stats.db: the game, the web server and the
+attribute editors all get connections with the same settings.
+
+The database runs in WAL mode so readers (web server, editors) never wait
+on a match that is writing, and the schema is upgraded through numbered
+migrations tracked in PRAGMA user_version.
+"""
+
+import sqlite3
+
+DB_PATH = 'game_stats.db'
+BUSY_TIMEOUT_MS = 5000  # Wait this long for another writer instead of failing
+CACHE_SIZE_KB = 8192
+
+
+def add_column(conn, table, definition):
+    """ALTER TABLE ... ADD COLUMN, skipped when the column already exists"""
+    try:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {definition}')
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+
+
+def create_base_tables(conn):
+    """Version 1: the tables as they were before migrations existed"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP,
+            ended_at TIMESTAMP,
+            total_players INTEGER,
+            winner TEXT,
+            duration_seconds REAL,
+            seed INTEGER
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            username TEXT,
+            kills INTEGER DEFAULT 0,
+            damage_dealt INTEGER DEFAULT 0,
+            damage_taken INTEGER DEFAULT 0,
+            survived_seconds REAL DEFAULT 0,
+            final_position INTEGER,
+            hp_start INTEGER,
+            strength INTEGER DEFAULT 5,
+            armor INTEGER DEFAULT 0,
+            luck INTEGER DEFAULT 0,
+            FOREIGN KEY (game_id) REFERENCES games(id)
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS kill_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            killer TEXT,
+            victim TEXT,
+            damage INTEGER,
+            timestamp TIMESTAMP,
+            FOREIGN KEY (game_id) REFERENCES games(id)
+        )
+    ''')
+
+    # Paid upgrades
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_attributes (
+            username TEXT PRIMARY KEY,
+            bonus_hp INTEGER DEFAULT 0,
+            bonus_strength INTEGER DEFAULT 0,
+            bonus_armor INTEGER DEFAULT 0,
+            bonus_luck INTEGER DEFAULT 0,
+            total_spent REAL DEFAULT 0,
+            last_payment TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS payment_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            attribute_type TEXT,
+            amount INTEGER,
+            price REAL,
+            pix_code TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP,
+            confirmed_at TIMESTAMP
+        )
+    ''')
+
+    # Older databases: games created before seeds, player_attributes
+    # created by the attribute editors without the payment columns
+    add_column(conn, 'games', 'seed INTEGER')
+    add_column(conn, 'player_attributes', 'total_spent REAL DEFAULT 0')
+    add_column(conn, 'player_attributes', 'last_payment TIMESTAMP')
+
+
+def create_indexes(conn):
+    """Version 2: indexes for the per-game and per-player lookups"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_game_user ON player_stats (game_id, username)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_user ON player_stats (username)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_kill_log_game ON kill_log (game_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_payment_queue_pix ON payment_queue (pix_code)')
+
+
+def create_player_totals(conn):
+    """
+    Version 3: per-player leaderboard totals, updated by GameLogger.end_game
+    in the same transaction as the match results, so rankings are a read
+    of the top rows instead of a GROUP BY over every match ever played.
+    Filled here from the finished matches already recorded.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_totals (
+            username TEXT PRIMARY KEY,
+            games INTEGER DEFAULT 0,
+            wins INTEGER DEFAULT 0,
+            kills INTEGER DEFAULT 0,
+            damage REAL DEFAULT 0,
+            position_sum INTEGER DEFAULT 0,
+            placed_games INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_player_totals_rank ON player_totals (wins DESC, kills DESC)')
+
+    conn.execute('''
+        INSERT INTO player_totals
+        (username, games, wins, kills, damage, position_sum, placed_games)
+        SELECT
+            player_stats.username,
+            COUNT(*),
+            SUM(CASE WHEN final_position = 1 THEN 1 ELSE 0 END),
+            COALESCE(SUM(kills), 0),
+            COALESCE(SUM(damage_dealt), 0),
+            COALESCE(SUM(final_position), 0),
+            COUNT(final_position)
+        FROM player_stats
+        JOIN games ON games.id = player_stats.game_id
+        WHERE games.ended_at IS NOT NULL
+        GROUP BY player_stats.username
+    ''')
+
+
+def create_damage_log(conn):
+    """
+    Version 4: one row per hit, for the per-match top damage. Damage is
+    REAL since armor-reduced hits are fractional; the index covers the
+    per-game SUM(damage) GROUP BY attacker query.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS damage_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER,
+            attacker TEXT,
+            victim TEXT,
+            damage REAL,
+            critical INTEGER DEFAULT 0,
+            tick INTEGER,
+            FOREIGN KEY (game_id) REFERENCES games(id)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_damage_log_game_attacker ON damage_log (game_id, attacker, damage)')
+
+
+# MIGRATIONS[n] upgrades a database from user_version n to n + 1.
+# Only ever append - a released migration must never change.
+MIGRATIONS = [
+    create_base_tables,
+    create_indexes,
+    create_player_totals,
+    create_damage_log,
+]
+
+
+def migrate(conn):
+    """Apply pending migrations, each in its own transaction"""
+    while True:
+        # Up-to-date databases are only read, so opening a connection
+        # never waits for a match that is writing
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= len(MIGRATIONS):
+            return version
+
+        # IMMEDIATE takes the write lock before re-reading the version, so
+        # two processes starting together can't apply the same migration
+        conn.execute('BEGIN IMMEDIATE')
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= len(MIGRATIONS):
+            conn.rollback()
+            return version
+        try:
+            MIGRATIONS[version](conn)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+            conn.commit()
+        except:
+            conn.rollback()
+            raise
+
+
+def connect(db_path=DB_PATH, **kwargs):
+    """Open game_stats.db in WAL mode with an up-to-date schema"""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, **kwargs)
+    conn.execute('PRAGMA journal_mode = WAL')
+    # NORMAL is durable in WAL mode except for the last commits on power loss
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    migrate(conn)
+    return conn
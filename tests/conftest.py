@@ -0,0 +1,20 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# The game's modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_sessionstart(session):
+    # game_logger and web_server open game_stats.db in the working directory
+    # as soon as they are imported - keep the suite away from the real one
+    session.config.scratch_dir = tempfile.mkdtemp(prefix='fightclub-tests-')
+    session.config.invocation_cwd = os.getcwd()
+    os.chdir(session.config.scratch_dir)
+
+
+def pytest_sessionfinish(session):
+    os.chdir(session.config.invocation_cwd)
+    shutil.rmtree(session.config.scratch_dir, ignore_errors=True)
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+from PIL import Image
+
+import avatar_atlas
+from avatar_atlas import AVATAR_TILE, PAGE_COLUMNS, PAGE_ROWS, load_avatar_atlas
+from render_cache import AvatarCache
+from simulation import INITIAL_SIZE
+
+
+@pytest.fixture(autouse=True)
+def display():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    yield
+    pygame.display.quit()
+
+
+def make_pictures(directory, count):
+    paths = []
+    for n in range(count):
+        path = str(directory / f"user{n}.jpg")
+        Image.new('RGB', (AVATAR_TILE, AVATAR_TILE), (n % 256, 255 - n % 256, 90)).save(path, quality=100)
+        paths.append(path)
+    return paths
+
+
+def centre_colour(avatars, path):
+    return tuple(avatars[path][0].get_at((AVATAR_TILE // 2, AVATAR_TILE // 2)))[:3]
+
+
+def test_atlas_round_trip(tmp_path, capsys):
+    paths = make_pictures(tmp_path, 3) + [str(tmp_path / 'missing.jpg')]
+    cache_dir = str(tmp_path / 'cache')
+
+    built = load_avatar_atlas(paths, cache_dir)
+    assert "Construindo" in capsys.readouterr().out
+    assert sorted(built) == sorted(paths[:3])
+
+    loaded = load_avatar_atlas(paths, cache_dir)
+    assert "Construindo" not in capsys.readouterr().out
+    for path in paths[:3]:
+        assert centre_colour(loaded, path) == centre_colour(built, path)
+
+
+def test_interrupted_build_is_not_reused(tmp_path, monkeypatch, capsys):
+    per_page = PAGE_COLUMNS * PAGE_ROWS
+    paths = make_pictures(tmp_path, per_page + 2)
+    cache_dir = str(tmp_path / 'cache')
+    expected = {path: centre_colour(load_avatar_atlas(paths[1:], cache_dir), path) for path in paths[1:5]}
+
+    # A rebuild for a roster with a new picture at the front (every slot
+    # shifts) dies after its first page is in place
+    writes = []
+
+    def open_file(path, mode='r', *args, **kwargs):
+        if 'w' in mode:
+            writes.append(path)
+            if len(writes) == 2:
+                raise KeyboardInterrupt
+        return open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(avatar_atlas, 'open', open_file, raising=False)
+    with pytest.raises(KeyboardInterrupt):
+        load_avatar_atlas(paths, cache_dir)
+    monkeypatch.undo()
+    capsys.readouterr()
+
+    # Every path of this roster is in the old index - it must not be trusted
+    avatars = load_avatar_atlas(paths[1:5], cache_dir)
+    assert "Construindo" in capsys.readouterr().out
+    assert {path: centre_colour(avatars, path) for path in paths[1:5]} == expected
+
+
+def test_big_sprites_come_from_the_original_file(tmp_path):
+    # A detailed picture bigger than the atlas tile
+    path = str(tmp_path / 'big.png')
+    Image.radial_gradient('L').resize((400, 400)).convert('RGB').save(path)
+
+    atlas_cache = AvatarCache()
+    atlas_cache.preload(load_avatar_atlas([path], str(tmp_path / 'cache')), INITIAL_SIZE)
+    file_cache = AvatarCache()
+    file_cache.load(path)
+
+    for size in (INITIAL_SIZE, 200):
+        atlas_sprite = atlas_cache.masked_avatar(path, size)
+        file_sprite = file_cache.masked_avatar(path, size)
+        assert atlas_sprite.get_size() == (size, size)
+        if size > AVATAR_TILE:
+            assert pygame.image.tobytes(atlas_sprite, 'RGBA') == pygame.image.tobytes(file_sprite, 'RGBA')
@@ -0,0 +1,84 @@
+import json
+import math
+import sqlite3
+import statistics
+
+import pytest
+
+from batch_simulator import (iter_batch, load_active_users, run_batch, save_results, simulate_match,
+                             summarize)
+
+USERS = [{'instagram_username': f'player_{n:02d}', 'is_active_follower': n % 5 != 0} for n in range(40)]
+
+
+def test_load_active_users(tmp_path):
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps(USERS))
+    assert load_active_users(str(path)) == [user for user in USERS if user['is_active_follower']]
+
+
+def test_pooled_run_matches_serial_run():
+    serial = run_batch(USERS, 6, base_seed=10, max_ticks=900, workers=1, attributes={})
+    pooled = run_batch(USERS, 6, base_seed=10, max_ticks=900, workers=2, attributes={})
+
+    assert [result['seed'] for result in serial] == list(range(10, 16))
+    assert pooled == serial
+    # Every seed plays out differently, with fighting in all of them
+    damage = [tuple(stats['damage_dealt'] for stats in result['players'].values()) for result in serial]
+    assert len(set(damage)) == len(damage)
+    assert all(sum(dealt) > 0 for dealt in damage)
+
+
+def test_results_are_written_as_they_arrive(tmp_path):
+    db_path = str(tmp_path / 'batch.db')
+    seen = []
+
+    def results():
+        for result in iter_batch(USERS[:8], 3, base_seed=0, max_ticks=200, attributes={}):
+            # Earlier matches are already in the open transaction
+            seen.append(len(written))
+            yield result
+
+    written = []
+    run_id, matches, _ = save_results(results(), 'users.json', 0, db_path,
+                                      on_result=lambda result: written.append(result['seed']))
+    assert (matches, written, seen) == (3, [0, 1, 2], [0, 1, 2])
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute('SELECT matches FROM batch_runs WHERE id = ?', (run_id,)).fetchone() == (3,)
+        assert conn.execute('SELECT seed FROM batch_matches ORDER BY match_index').fetchall() == [(0,), (1,), (2,)]
+        assert conn.execute('SELECT COUNT(*) FROM batch_player_results').fetchone() == (24,)
+    finally:
+        conn.close()
+
+
+def test_summary_matches_direct_statistics():
+    results = run_batch(USERS[:10], 4, base_seed=3, max_ticks=400, attributes={})
+    rows = {row['username']: row for row in summarize(results)}
+
+    damage = [result['players']['player_01']['damage_dealt'] for result in results]
+    mean, half_width = rows['player_01']['damage_dealt']
+    assert mean == pytest.approx(statistics.fmean(damage))
+    assert half_width == pytest.approx(1.96 * statistics.stdev(damage) / math.sqrt(len(damage)))
+    assert sum(row['wins'] for row in rows.values()) == sum(1 for result in results if result['winner'])
+
+
+def test_default_engine_plays_the_game():
+    from simulation import BattleSimulation, Fighter, MatchRandom
+
+    users = [{'instagram_username': f'crowd_{n:02d}'} for n in range(60)]
+    for seed in range(2):
+        rng = MatchRandom(seed)
+        dealt = {user['instagram_username']: 0 for user in users}
+
+        def on_hit(attacker, victim, damage, critical):
+            dealt[attacker.username] += damage
+
+        simulation = BattleSimulation([Fighter(user, rng, {}) for user in users], on_hit=on_hit)
+        simulation.run(600)
+        result = simulate_match(users, seed, max_ticks=600, attributes={})
+
+        assert result['ticks'] == simulation.tick
+        assert {username: stats['damage_dealt'] for username, stats in result['players'].items()} == dealt
+        assert sum(dealt.values()) > 0
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+import stats_db
+from game_logger import StatsWriter
+
+INSERT_GAME = 'INSERT INTO games (winner, total_players) VALUES (?, ?)'
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'stats.db')
+    stats_db.connect(path).close()
+    return path
+
+
+def winners(db_path):
+    conn = stats_db.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute('SELECT winner FROM games ORDER BY id')]
+    finally:
+        conn.close()
+
+
+def test_writes_are_committed_in_order(db_path):
+    writer = StatsWriter(db_path)
+    for n in range(5):
+        writer.submit(INSERT_GAME, (f'player_{n}', 10))
+    writer.submit_group([(INSERT_GAME, ('group_a', 2)), (INSERT_GAME, ('group_b', 2))])
+    writer.flush()
+    assert winners(db_path) == [f'player_{n}' for n in range(5)] + ['group_a', 'group_b']
+    writer.close()
+
+
+def test_closed_writer_fails_fast(db_path):
+    writer = StatsWriter(db_path)
+    writer.submit(INSERT_GAME, ('last', 2))
+    writer.close()
+    assert winners(db_path) == ['last']
+
+    # Run in a thread so a regression hangs the thread, not the suite
+    outcome = {}
+
+    def use_closed_writer():
+        writer.flush()
+        writer.close()
+        for call in (lambda: writer.submit(INSERT_GAME, ('late', 2)),
+                     lambda: writer.submit_group([(INSERT_GAME, ('late', 2))])):
+            with pytest.raises(RuntimeError):
+                call()
+        writer.flush()
+        outcome['done'] = True
+
+    thread = threading.Thread(target=use_closed_writer, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert outcome.get('done')
+    assert winners(db_path) == ['last']
+
+
+
+def test_failing_group_only_loses_itself(db_path, capsys):
+    groups = [
+        [(INSERT_GAME, ('before', 2))],
+        [(INSERT_GAME, ('bad', 2)), ('INSERT INTO no_such_table VALUES (?)', (1,))],
+        [(INSERT_GAME, ('end_game', 2)), ('UPDATE games SET total_players = ? WHERE winner = ?', (3, 'end_game'))],
+    ]
+    writer = StatsWriter(db_path)
+    conn = stats_db.connect(db_path)
+    try:
+        writer.commit(conn, groups)
+    finally:
+        conn.close()
+
+    assert winners(db_path) == ['before', 'end_game']
+    assert "no_such_table" in capsys.readouterr().out
+
+    # Same through the writer thread, however it batches the groups
+    for group in groups:
+        writer.submit_group(group)
+    writer.close()
+    assert winners(db_path) == ['before', 'end_game'] * 2
@@ -0,0 +1,85 @@
+import http.server
+import os
+import stat
+import threading
+
+import pytest
+
+from picture_downloader import PictureDownloader
+
+PICTURE = b'\xff\xd8\xff\xe0' + bytes(range(256)) * 64 + b'\xff\xd9'
+
+
+class PictureHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('ETag', '"v1"')
+            self.send_header('Last-Modified', 'Mon, 01 Jan 2024 00:00:00 GMT')
+            self.send_header('Content-Length', str(len(PICTURE)))
+            self.end_headers()
+            self.wfile.write(PICTURE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), PictureHandler)
+    server.daemon_threads = True
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", server.requests
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    downloader = PictureDownloader(str(tmp_path), workers=2, per_host_rate=0, retries=0)
+    yield downloader
+    downloader.close()
+
+
+def test_download_all(server, downloader, tmp_path):
+    base, _ = server
+    results = downloader.download_all([('alice', f"{base}/1_n.jpg"), ('bruno', f"{base}/missing.jpg")])
+
+    assert results['bruno'] is None
+    assert results['alice'] == {'path': str(tmp_path / 'alice.jpg'), 'etag': '"v1"',
+                                'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT', 'changed': True}
+    assert (tmp_path / 'alice.jpg').read_bytes() == PICTURE
+    assert not list(tmp_path.glob('*.part'))
+
+
+def test_not_modified_keeps_file(server, downloader, tmp_path):
+    base, requests = server
+    (tmp_path / 'alice.jpg').write_bytes(b'local copy')
+
+    result = downloader.download('alice', f"{base}/1_n.jpg", ('"v1"', None))
+    assert result['changed'] is False and result['etag'] == '"v1"'
+    assert requests[-1] == ('/1_n.jpg', '"v1"')
+    assert (tmp_path / 'alice.jpg').read_bytes() == b'local copy'
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="POSIX permissions")
+def test_saved_picture_follows_umask(server, downloader, tmp_path):
+    base, _ = server
+    previous = os.umask(0o022)
+    try:
+        result = downloader.download('alice', f"{base}/1_n.jpg")
+    finally:
+        os.umask(previous)
+    assert stat.S_IMODE(os.stat(result['path']).st_mode) == 0o644
@@ -0,0 +1,133 @@
+import json
+import mmap
+import os
+import weakref
+
+import pytest
+
+from roster_cache import RosterSources, load_roster
+
+USERS = [
+    {'instagram_username': 'alice', 'profile_pic_path': 'profiles/alice.jpg',
+     'is_active_follower': True, 'stats': {'hp': 100, 'strength': 5, 'armor': 3, 'luck': 2}},
+    {'instagram_username': 'bruno', 'is_active_follower': True},
+    {'instagram_username': 'carla', 'is_active_follower': False},
+]
+
+
+@pytest.fixture
+def sources(tmp_path):
+    (tmp_path / 'users.json').write_text(json.dumps(USERS, indent=2))
+    (tmp_path / 'atributos.json').write_text(json.dumps({'bruno': {'hp': 10}}))
+    return RosterSources(users_file=str(tmp_path / 'users.json'),
+                         scraped_db=str(tmp_path / 'scraped_users.db'),
+                         stats_db=str(tmp_path / 'game_stats.db'),
+                         attributes_json=str(tmp_path / 'atributos.json'))
+
+
+@pytest.fixture
+def windows_replace(monkeypatch):
+    """Make os.replace refuse targets that are still mapped, like Windows does"""
+    maps = weakref.WeakSet()
+
+    class TrackedMap(mmap.mmap):
+        def __new__(cls, fileno, *args, **kwargs):
+            mapped = super().__new__(cls, fileno, *args, **kwargs)
+            mapped.path = os.path.realpath(f"/proc/self/fd/{fileno}")
+            maps.add(mapped)
+            return mapped
+
+    real_replace = os.replace
+
+    def replace(src, dst):
+        target = os.path.realpath(dst)
+        if any(not mapped.closed and mapped.path == target for mapped in maps):
+            raise PermissionError(13, "file is mapped", dst)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(mmap, 'mmap', TrackedMap)
+    monkeypatch.setattr(os, 'replace', replace)
+
+
+def reopen(sources):
+    """The same sources as a new launch sees them - nothing loaded yet"""
+    return RosterSources(users_file=sources.users_file, scraped_db=sources.scraped_db,
+                         stats_db=sources.stats_db, attributes_json=sources.attributes_json)
+
+
+def expected_roster():
+    followers = [
+        {'instagram_username': 'alice', 'profile_pic_path': 'profiles/alice.jpg', 'is_active_follower': True,
+         'stats': {'hp': 100, 'strength': 5, 'armor': 3, 'luck': 2}},
+        {'instagram_username': 'bruno', 'is_active_follower': True},
+    ]
+    attributes = {'bruno': {'hp': 10, 'forca': 0, 'armadura': 0, 'sorte': 0}}
+    return followers, attributes
+
+
+def test_round_trip(tmp_path, sources):
+    roster_file = str(tmp_path / 'roster.bin')
+    assert load_roster(roster_file, sources) == expected_roster()
+    assert load_roster(roster_file, reopen(sources)) == expected_roster()
+
+
+def test_touched_source_reloads(tmp_path, sources, windows_replace, capsys):
+    roster_file = str(tmp_path / 'roster.bin')
+    load_roster(roster_file, sources)
+    assert "Compilando" in capsys.readouterr().out
+
+    # Same content, new mtime - like game_stats.db after every match
+    stat = os.stat(sources.users_file)
+    os.utime(sources.users_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert load_roster(roster_file, reopen(sources)) == expected_roster()
+    assert "Compilando" not in capsys.readouterr().out
+
+    # The new signature was written back: the next launch doesn't re-hash
+    hashed = []
+    fresh = reopen(sources)
+    fresh.content_hash = lambda name: hashed.append(name)
+    assert load_roster(roster_file, fresh) == expected_roster()
+    assert hashed == []
+
+
+def test_changed_source_recompiles(tmp_path, sources, capsys):
+    roster_file = str(tmp_path / 'roster.bin')
+    load_roster(roster_file, sources)
+    capsys.readouterr()
+
+    users = USERS + [{'instagram_username': 'dani', 'is_active_follower': True}]
+    with open(sources.users_file, 'w') as f:
+        json.dump(users, f)
+
+    followers, _ = load_roster(roster_file, reopen(sources))
+    assert "Compilando" in capsys.readouterr().out
+    assert [user['instagram_username'] for user in followers] == ['alice', 'bruno', 'dani']
+
+
+@pytest.mark.parametrize('keep', [0.5, 0.9, 0.99])
+def test_truncated_roster_rebuilds(tmp_path, sources, capsys, keep):
+    roster_file = str(tmp_path / 'roster.bin')
+    load_roster(roster_file, sources)
+    with open(roster_file, 'r+b') as f:
+        f.truncate(int(os.path.getsize(roster_file) * keep))
+    capsys.readouterr()
+
+    assert load_roster(roster_file, reopen(sources)) == expected_roster()
+    assert "Compilando" in capsys.readouterr().out
+    assert load_roster(roster_file, reopen(sources)) == expected_roster()
+
+
+def test_fractional_values_survive(tmp_path, sources):
+    users = [dict(USERS[0], stats={'hp': 100, 'strength': 5.5, 'armor': 3, 'luck': 0.25})]
+    with open(sources.users_file, 'w') as f:
+        json.dump(users, f)
+    with open(sources.attributes_json, 'w') as f:
+        json.dump({'alice': {'hp': 12.5}}, f)
+
+    roster_file = str(tmp_path / 'roster.bin')
+    for launch in (sources, reopen(sources)):
+        followers, attributes = load_roster(roster_file, launch)
+        assert followers[0]['stats'] == {'hp': 100, 'strength': 5.5, 'armor': 3, 'luck': 0.25}
+        assert type(followers[0]['stats']['hp']) is int
+        assert attributes['alice'] == {'hp': 12.5, 'forca': 0, 'armadura': 0, 'sorte': 0}
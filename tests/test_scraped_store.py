@@ -0,0 +1,145 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from scraped_store import ScrapedUserStore, picture_identity
+
+CDN = "https://instagram.fcwb2-3.fna.fbcdn.net/v/t51.2885-19"
+
+
+def follower(username, picture, signature='a'):
+    return {'username': username, 'profile_pic_url': f"{CDN}/{picture}_n.jpg?oh={signature}&oe=68AE9794"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScrapedUserStore(str(tmp_path / 'scraped_users.db'))
+    yield store
+    store.close()
+
+
+def save_with_file(store, tmp_path, entry, etag='"v1"'):
+    path = tmp_path / f"{entry['username']}.jpg"
+    path.write_bytes(b'jpeg')
+    store.save_user(entry['username'], entry['profile_pic_url'], str(path), etag, None)
+    return str(path)
+
+
+def test_picture_identity_ignores_signed_query():
+    assert picture_identity(follower('a', '123')['profile_pic_url']) == '123_n.jpg'
+    assert picture_identity(follower('a', '123', 'b')['profile_pic_url']) == '123_n.jpg'
+    assert picture_identity(None) is None
+
+
+def test_plan_refresh(store, tmp_path):
+    unchanged = follower('alice', '1')
+    changed = follower('bruno', '2')
+    lost = follower('carla', '3')
+    alice_path = save_with_file(store, tmp_path, unchanged)
+    bruno_path = save_with_file(store, tmp_path, changed)
+    store.save_user('carla', lost['profile_pic_url'], str(tmp_path / 'gone.jpg'))
+
+    followers = [
+        follower('alice', '1', 'fresh-signature'),
+        follower('bruno', '2b'),
+        follower('carla', '3'),
+        follower('dani', '4'),
+        {'username': 'eduardo', 'profile_pic_url': None},
+    ]
+    items, validators = store.plan_refresh(followers)
+
+    assert [username for username, _ in items] == ['bruno', 'carla', 'dani']
+    assert validators == {}  # A changed picture is a different resource
+    assert followers[0]['profile_pic_path'] == alice_path
+    assert followers[1]['profile_pic_path'] == bruno_path  # Kept should the download fail
+    assert 'profile_pic_path' not in followers[3]
+
+
+def test_plan_refresh_revalidates_old_checks(store, tmp_path):
+    entry = follower('alice', '1')
+    save_with_file(store, tmp_path, entry)
+    save_with_file(store, tmp_path, follower('bruno', '2'), etag=None)
+    store.flush()
+    store.conn.execute('UPDATE users SET scraped_at = ?', (datetime.now() - timedelta(days=31),))
+
+    items, validators = store.plan_refresh([follower('alice', '1', 'b'), follower('bruno', '2', 'b')])
+    assert items == [('alice', follower('alice', '1', 'b')['profile_pic_url'])]
+    assert validators == {'alice': ('"v1"', None)}  # bruno has nothing to send
+
+    items, validators = store.plan_refresh([follower('alice', '1', 'b')], revalidate_after=timedelta(days=60))
+    assert items == [] and validators == {}
+
+
+def active_users(store):
+    return dict(store.conn.execute('SELECT username, is_active FROM users').fetchall())
+
+
+def test_sync_active_marks_missing_followers_inactive(store):
+    everyone = [follower(f"user{n}", str(n)) for n in range(20)]
+    assert store.sync_active(everyone) == 0
+
+    assert store.sync_active(everyone[1:]) == 1
+    assert active_users(store)['user0'] == 0
+
+    # Coming back makes them active again
+    assert store.sync_active(everyone) == 0
+    assert all(active_users(store).values())
+
+
+def test_sync_active_keeps_everyone_on_incomplete_list(store):
+    everyone = [follower(f"user{n}", str(n)) for n in range(20)]
+    store.sync_active(everyone)
+
+    assert store.sync_active(everyone[:10] + [follower('newcomer', '99')]) is None
+    users = active_users(store)
+    assert all(users.values())
+    assert 'newcomer' in users  # Still recorded
+
+
+def test_sync_active_keeps_stored_picture_url(store, tmp_path):
+    entry = follower('alice', '1')
+    save_with_file(store, tmp_path, entry)
+    store.sync_active([follower('alice', '1b')])
+
+    items, _ = store.plan_refresh([follower('alice', '1b')])
+    assert [username for username, _ in items] == ['alice']
+
+
+def test_export_order(store):
+    store.sync_active([follower('zoe', '1'), follower('alice', '2'), follower('mia', '3')])
+    store.sync_active([follower('zoe', '1'), follower('alice', '2'), follower('mia', '3')][::-1])
+    # Rows from before list positions existed, one still active
+    store.conn.execute("INSERT INTO users (username, has_picture, is_active) VALUES ('aaa', 0, 1)")
+    store.conn.execute("INSERT INTO users (username, has_picture, is_active) VALUES ('bbb', 0, 0)")
+
+    users = [(user['instagram_username'], user['is_active_follower']) for user in store.iter_game_users()]
+    assert users == [('mia', True), ('alice', True), ('zoe', True), ('aaa', True)]
+
+
+def test_export_skips_followers_who_left(store, tmp_path):
+    followers = [follower(f'user_{n}', str(n)) for n in range(20)]
+    save_with_file(store, tmp_path, followers[0])
+    store.sync_active(followers)
+    store.sync_active(followers[1:])
+
+    users = list(store.iter_game_users())
+    assert [user['instagram_username'] for user in users] == [f'user_{n}' for n in range(1, 20)]
+    assert users[0]['profile_pic_path'] == 'profiles/user_1.png'
+    assert 'user_0' in store.known_users()
+
+
+def test_export_users_json_matches_json_dump(store, tmp_path):
+    store.sync_active([follower('zoé "z"', '1'), {'username': 'bruno', 'profile_pic_url': None}])
+    store.save_user('bruno', None, 'profiles/bruno.jpg')
+    path = tmp_path / 'users.json'
+
+    assert store.export_users_json(str(path)) == 2
+    text = path.read_text()
+    assert text == json.dumps(json.loads(text), indent=2)
+    assert json.loads(text)[1]['profile_pic_path'] == 'profiles/bruno.jpg'
+
+    empty = ScrapedUserStore(str(tmp_path / 'empty.db'))
+    empty.export_users_json(str(path))
+    empty.close()
+    assert path.read_text() == '[]'
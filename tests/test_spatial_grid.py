@@ -0,0 +1,69 @@
+import math
+import random
+
+import pytest
+
+from spatial_grid import SpatialGrid
+
+RADIUS = 20
+
+
+def scatter(count, seed, width=400, height=300):
+    rng = random.Random(seed)
+    return [[rng.uniform(0, width), rng.uniform(0, height)] for _ in range(count)]
+
+
+def touching(positions, i, j):
+    return math.dist(positions[i], positions[j]) < 2 * RADIUS
+
+
+def push_apart(positions, i, j):
+    """Separate a touching pair along the line between them, like collide_with"""
+    (x1, y1), (x2, y2) = positions[i], positions[j]
+    distance = math.dist(positions[i], positions[j]) or 1.0
+    overlap = (2 * RADIUS - distance) / 2 + 0.5
+    dx, dy = (x2 - x1) / distance, (y2 - y1) / distance
+    positions[i] = [x1 - dx * overlap, y1 - dy * overlap]
+    positions[j] = [x2 + dx * overlap, y2 + dy * overlap]
+
+
+def collide(positions, pairs):
+    """Touching pairs in the order they are met, pushing each apart"""
+    hits = []
+    for i, j in pairs:
+        if touching(positions, i, j):
+            hits.append((i, j))
+            push_apart(positions, i, j)
+    return hits
+
+
+def all_pairs(count):
+    for i in range(count):
+        for j in range(i + 1, count):
+            yield i, j
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pairs_match_brute_force(seed):
+    positions = scatter(120, seed)
+    grid = SpatialGrid(2 * RADIUS)
+    candidates = list(grid.pairs(len(positions), lambda k: tuple(positions[k])))
+
+    assert candidates == sorted(set(candidates))
+    assert ([pair for pair in candidates if touching(positions, *pair)]
+            == [pair for pair in all_pairs(len(positions)) if touching(positions, *pair)])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pairs_follow_fighters_pushed_apart(seed):
+    # Crowded enough that pushes carry fighters across cells mid-scan
+    positions = scatter(150, seed, width=250, height=200)
+    expected_positions = [list(position) for position in positions]
+    expected = collide(expected_positions, all_pairs(len(positions)))
+
+    grid = SpatialGrid(2 * RADIUS)
+    hits = collide(positions, grid.pairs(len(positions), lambda k: tuple(positions[k])))
+
+    assert len(expected) > len(positions) // 2
+    assert hits == expected
+    assert positions == expected_positions
@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+
+import stats_db
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """game_stats.db as written before migrations: no seed, no totals, no damage_log"""
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP, ended_at TIMESTAMP,
+            total_players INTEGER, winner TEXT, duration_seconds REAL
+        );
+        CREATE TABLE player_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id INTEGER, username TEXT,
+            kills INTEGER DEFAULT 0, damage_dealt INTEGER DEFAULT 0,
+            damage_taken INTEGER DEFAULT 0, survived_seconds REAL DEFAULT 0,
+            final_position INTEGER, hp_start INTEGER,
+            strength INTEGER DEFAULT 5, armor INTEGER DEFAULT 0, luck INTEGER DEFAULT 0
+        );
+        CREATE TABLE player_attributes (
+            username TEXT PRIMARY KEY,
+            bonus_hp INTEGER DEFAULT 0, bonus_strength INTEGER DEFAULT 0,
+            bonus_armor INTEGER DEFAULT 0, bonus_luck INTEGER DEFAULT 0
+        );
+
+        INSERT INTO games (id, ended_at, total_players, winner) VALUES
+            (1, '2025-01-01 10:00', 3, 'ana'),
+            (2, '2025-01-02 10:00', 2, 'bia'),
+            (3, NULL, 3, NULL);
+        INSERT INTO player_stats (game_id, username, kills, damage_dealt, final_position) VALUES
+            (1, 'ana', 2, 150, 1), (1, 'bia', 0, 40, 2), (1, 'caio', 0, 10, 3),
+            (2, 'ana', 0, 90, 2), (2, 'bia', 1, 120, 1),
+            (3, 'ana', 5, 500, NULL), (3, 'caio', 1, 80, NULL);
+        INSERT INTO player_attributes (username, bonus_hp) VALUES ('ana', 20);
+    ''')
+    conn.close()
+    return path
+
+
+def test_fresh_database(tmp_path):
+    conn = stats_db.connect(str(tmp_path / 'fresh.db'))
+    try:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == len(stats_db.MIGRATIONS)
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert 'seed' in columns(conn, 'games')
+        assert columns(conn, 'damage_log')
+        assert {'idx_player_stats_game_user', 'idx_player_totals_rank',
+                'idx_damage_log_game_attacker'} <= indexes(conn)
+    finally:
+        conn.close()
+
+
+def test_legacy_database_is_upgraded(legacy_db):
+    conn = stats_db.connect(legacy_db)
+    try:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == len(stats_db.MIGRATIONS)
+        assert 'seed' in columns(conn, 'games')
+        assert {'total_spent', 'last_payment'} <= set(columns(conn, 'player_attributes'))
+        assert conn.execute("SELECT bonus_hp FROM player_attributes WHERE username = 'ana'").fetchone() == (20,)
+
+        # Totals only count finished games
+        totals = conn.execute('''
+            SELECT username, games, wins, kills, damage, position_sum, placed_games
+            FROM player_totals ORDER BY username
+        ''').fetchall()
+        assert totals == [
+            ('ana', 2, 1, 2, 240, 3, 2),
+            ('bia', 2, 1, 1, 160, 3, 2),
+            ('caio', 1, 0, 0, 10, 3, 1),
+        ]
+    finally:
+        conn.close()
+
+    # Reopening an up-to-date database doesn't run migrations again
+    conn = stats_db.connect(legacy_db)
+    try:
+        assert conn.execute('SELECT SUM(games) FROM player_totals').fetchone() == (5,)
+    finally:
+        conn.close()
+
+
+def test_failed_migration_is_rolled_back(legacy_db, monkeypatch):
+    def broken(conn):
+        conn.execute('CREATE TABLE half_done (id INTEGER)')
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(stats_db, 'MIGRATIONS', stats_db.MIGRATIONS[:2] + [broken])
+    with pytest.raises(sqlite3.OperationalError):
+        stats_db.connect(legacy_db)
+
+    conn = sqlite3.connect(legacy_db)
+    try:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == 2
+        assert not columns(conn, 'half_done')
+        assert 'idx_player_stats_user' in indexes(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from simulation import BattleSimulation, Fighter, MatchRandom
+from vector_simulation import VectorizedSimulation
+
+STATE = ('x', 'y', 'vx', 'vy', 'current_size', 'radius', 'speed_multiplier', 'hp')
+
+
+def roster(count):
+    return [{'instagram_username': f'player_{n:03d}'} for n in range(count)]
+
+
+def play(engine, users, seed, max_ticks=None, **options):
+    """Hit/kill trace and final fighter state of one seeded match"""
+    rng = MatchRandom(seed)
+    fighters = [Fighter(user, rng, attributes={}) for user in users]
+    trace = []
+
+    def on_hit(attacker, victim, damage, critical):
+        trace.append(('hit', simulation.tick, attacker.username, victim.username, damage, critical))
+
+    def on_kill(killer, victim):
+        trace.append(('kill', simulation.tick, killer.username, victim.username))
+
+    simulation = engine(fighters, on_hit=on_hit, on_kill=on_kill, **options)
+    simulation.run(max_ticks)
+    if hasattr(simulation, 'sync_fighters'):
+        simulation.sync_fighters()
+
+    state = {fighter.username: tuple(getattr(fighter, name) for name in STATE)
+             for fighter in simulation.fighters}
+    winner = simulation.winner.username if simulation.winner else None
+    return trace, state, winner, simulation.tick
+
+
+@pytest.mark.parametrize('seed', [1, 7, 42])
+def test_vector_engine_matches_objects(seed):
+    users = roster(60)
+    expected = play(BattleSimulation, users, seed)
+    trace, state, winner, ticks = play(VectorizedSimulation, users, seed)
+
+    assert sum(1 for event in expected[0] if event[0] == 'kill') >= len(users) - 1
+    assert trace == expected[0]
+    assert state == expected[1]
+    assert (winner, ticks) == expected[2:]
+
+
+def test_vector_engine_matches_objects_mid_match():
+    users = roster(300)
+    expected = play(BattleSimulation, users, 3, max_ticks=400)
+    assert play(VectorizedSimulation, users, 3, max_ticks=400) == expected
+    assert len(expected[1]) > 1
+
+
+def test_batched_engine_finishes_seeded_matches():
+    users = roster(200)
+    first = play(VectorizedSimulation, users, 5, batched=True)
+    assert first == play(VectorizedSimulation, users, 5, batched=True)
+
+    trace, state, winner, _ = first
+    killed = [event[3] for event in trace if event[0] == 'kill']
+    assert len(set(killed)) == len(users) - len(state)
+    assert winner is None or list(state) == [winner]
+
+
+def test_collision_rounds_keep_every_fighters_order():
+    rng = MatchRandom(11)
+    fighters = [Fighter(user, rng, attributes={}) for user in roster(400)]
+    simulation = VectorizedSimulation(fighters)
+    first, second = simulation.candidate_pairs(margin=60)
+    rounds = simulation.collision_rounds(first, second)
+    assert len(rounds) > 10
+
+    # Every pair exactly once, no fighter twice in a round
+    assert sorted(np.concatenate(rounds).tolist()) == list(range(len(first)))
+    for pairs in rounds:
+        members = np.concatenate((first[pairs], second[pairs]))
+        assert len(np.unique(members)) == len(members)
+
+    # Each fighter meets its pairs in the original order
+    seen = {}
+    for pairs in rounds:
+        for pair in pairs.tolist():
+            for fighter in (first[pair], second[pair]):
+                assert seen.get(fighter, -1) < pair
+                seen[fighter] = pair
@@ -0,0 +1,116 @@
+import email.utils
+import gzip
+import http.client
+import json
+import threading
+
+import pytest
+
+import stats_db
+import web_server
+from load_test import run_load
+from web_server import FightClubHandler, FightClubServer, StatsCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'game_stats.db')
+    conn = stats_db.connect(path)
+    with conn:
+        conn.executemany('INSERT INTO player_totals (username, games, wins, kills) VALUES (?, ?, ?, ?)',
+                         [(f"player_{n:03d}", 10, n % 7, n) for n in range(40)])
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def cache(db_path, monkeypatch):
+    monkeypatch.setattr(web_server, 'STATS_CHECK_SECONDS', 0)
+    cache = StatsCache(db_path)
+    monkeypatch.setattr(web_server, 'stats_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def server(cache):
+    server = FightClubServer(('127.0.0.1', 0), FightClubHandler, workers=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def get(server):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+
+    def get(headers=None):
+        conn.request('GET', '/api/stats', headers=headers or {})
+        response = conn.getresponse()
+        return response, response.read()
+
+    yield get
+    conn.close()
+
+
+def add_win(db_path, username='player_000'):
+    conn = stats_db.connect(db_path)
+    with conn:
+        conn.execute('UPDATE player_totals SET wins = wins + 1 WHERE username = ?', (username,))
+    conn.close()
+
+
+def test_gzip_and_plain_bodies_match(get):
+    plain, body = get()
+    assert plain.status == 200 and plain.getheader('Content-Encoding') is None
+
+    compressed, gz_body = get({'Accept-Encoding': 'gzip'})
+    assert compressed.getheader('Content-Encoding') == 'gzip'
+    assert gzip.decompress(gz_body) == body
+    assert compressed.getheader('ETag') == plain.getheader('ETag')
+    assert len(json.loads(body)['rankings']) == 40
+
+
+def test_not_modified(get):
+    response, _ = get()
+    etag, last_modified = response.getheader('ETag'), response.getheader('Last-Modified')
+
+    response, body = get({'If-None-Match': etag})
+    assert response.status == 304 and body == b''
+    assert get({'If-None-Match': f'"other", {etag}'})[0].status == 304
+    assert get({'If-Modified-Since': last_modified})[0].status == 304
+    # If-None-Match wins over If-Modified-Since
+    assert get({'If-None-Match': '"other"', 'If-Modified-Since': last_modified})[0].status == 200
+
+
+def test_change_within_the_same_second(get, db_path):
+    first, _ = get()
+    add_win(db_path, 'player_034')
+    second, body = get({'If-Modified-Since': first.getheader('Last-Modified')})
+
+    assert second.status == 200
+    assert second.getheader('ETag') != first.getheader('ETag')
+    seconds = [email.utils.parsedate_to_datetime(response.getheader('Last-Modified')).timestamp()
+               for response in (first, second)]
+    assert seconds[1] > seconds[0]
+    assert json.loads(body)['rankings'][0] == {'username': 'player_034', 'games': 10, 'wins': 7,
+                                               'kills': 34, 'damage': 0.0, 'avg_position': 0}
+
+
+def test_unchanged_stats_keep_etag(cache, db_path):
+    before = cache.get()
+    conn = stats_db.connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO games (started_at) VALUES ('2024-01-01')")  # Not shown on the site
+    conn.close()
+    assert cache.get() is before
+
+
+def test_idle_keep_alive_clients_give_workers_up(server):
+    # Three times as many idle keep-alive connections as workers
+    summary = run_load(f"http://127.0.0.1:{server.server_address[1]}", ['/api/stats'], concurrency=2,
+                       duration=1, keep_alive=False, idle_clients=6, timeout=5)
+
+    assert summary['errors'] == 0 and summary['requests'] > 0
+    assert summary['max_ms'] < web_server.KEEPALIVE_TIMEOUT * 1000
+    assert summary['idle_closed'] == 6
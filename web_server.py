@@ -3,32 +3,237 @@
 Simple Web Server for Fight Club Rankings
 """
 
+import email.utils
+import gzip
+import hashlib
 import http.server
-import socketserver
 import json
 import os
-from game_logger import game_logger
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import stats_db
+from game_logger import collect_stats, game_logger
 
 PORT = 8080
+MAX_WORKERS = 16  # Connections handled at once, keep-alive ones included
+LISTEN_BACKLOG = 64  # Connections the OS queues while every worker is busy
+REQUEST_TIMEOUT = 10  # Seconds a client may stall in the middle of a request
+KEEPALIVE_TIMEOUT = 2  # Seconds an idle connection may hold a worker waiting for its next request
+IDLE_POLL_SECONDS = 0.05  # How often idle connections check whether a worker is wanted
+STATS_CHECK_SECONDS = 1.0  # How often the stats cache asks SQLite whether anything changed
+GZIP_MIN_BYTES = 1024  # Smaller payloads aren't worth compressing
+
+class StatsCache:
+    """
+    The /api/stats response, kept in memory and rebuilt only when the
+    database changed. PRAGMA data_version moves whenever another
+    connection commits (a match ending in the game process, a payment),
+    and it is polled at most once per STATS_CHECK_SECONDS, so most
+    requests are served without touching SQLite or the filesystem.
+    """
+
+    def __init__(self, db_path=stats_db.DB_PATH):
+        self.conn = stats_db.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.data_version = None
+        self.checked_at = None
+        self.response = None
+
+    def get(self):
+        """(etag, last_modified, body, gzipped body or None) - treat as read-only"""
+        with self.lock:
+            now = time.monotonic()
+            if self.checked_at is None or now - self.checked_at >= STATS_CHECK_SECONDS:
+                self.checked_at = now
+                data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+                if data_version != self.data_version:
+                    self.data_version = data_version
+                    self.rebuild()
+            return self.response
+
+    def rebuild(self):
+        stats = collect_stats(self.conn.cursor())
+
+        # Same stats, same ETag - a commit that didn't change the site
+        # (a kill mid-match) keeps browsers on 304
+        content = json.dumps(stats, sort_keys=True, default=str).encode()
+        etag = '"' + hashlib.sha1(content).hexdigest()[:16] + '"'
+        if self.response is not None and self.response[0] == etag:
+            return
+
+        body = json.dumps({
+            'last_updated': datetime.now().isoformat(),
+            'rankings': stats['rankings'],
+            'recent_games': stats['recent_games']
+        }, indent=2).encode()
+        compressed = gzip.compress(body) if len(body) >= GZIP_MIN_BYTES else None
+
+        # Last-Modified has one-second precision: two rebuilds within a second
+        # must still differ, or If-Modified-Since answers 304 for the newer one
+        last_modified = int(time.time())
+        if self.response is not None:
+            last_modified = max(last_modified, self.response[1] + 1)
+        self.response = (etag, last_modified, body, compressed)
+
+stats_cache = StatsCache()
+
+def accepts_gzip(header):
+    """True if an Accept-Encoding header allows gzip"""
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '').lower() not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+# create_payment shares game_logger's connection - one worker at a time
+payment_lock = threading.Lock()
+
+class FightClubServer(http.server.HTTPServer):
+    """
+    HTTPServer with a fixed pool of worker threads. When every worker is
+    busy the accept loop waits, so extra connections stay in the bounded
+    listen backlog instead of spawning more threads. While it waits,
+    keep-alive connections close after their current response instead of
+    holding a worker idle.
+    """
+
+    request_queue_size = LISTEN_BACKLOG
+
+    def __init__(self, server_address, handler_class, workers=MAX_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http')
+        self.free_workers = threading.BoundedSemaphore(workers)
+        self.workers_wanted = threading.Event()
+
+    def process_request(self, request, client_address):
+        if not self.free_workers.acquire(blocking=False):
+            self.workers_wanted.set()
+            self.free_workers.acquire()
+            self.workers_wanted.clear()
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.free_workers.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
 
 class FightClubHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive: every response must carry a Content-Length
+    protocol_version = 'HTTP/1.1'
+    timeout = REQUEST_TIMEOUT
+    # Headers and body are separate writes - without this, Nagle plus
+    # delayed ACKs hold every keep-alive response back ~40 ms
+    disable_nagle_algorithm = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory="web", **kwargs)
     
+    def handle(self):
+        """Serve requests until the client is done or goes idle"""
+        self.close_connection = True
+        first = True
+        while self.wait_for_request(first):
+            first = False
+            self.handle_one_request()
+            if self.close_connection:
+                break
+    
+    def wait_for_request(self, first):
+        """
+        Wait up to KEEPALIVE_TIMEOUT for the next request to start - False
+        closes the connection. An idle connection only blocks a worker, so
+        it gets a short timeout, and a kept-alive one gives up at once when
+        new connections are waiting for a worker. Once a request starts it
+        has the full REQUEST_TIMEOUT.
+        """
+        deadline = time.monotonic() + KEEPALIVE_TIMEOUT
+        # Non-blocking peek: a request already buffered (pipelined) counts
+        self.connection.settimeout(0)
+        try:
+            while not self.rfile.peek(1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (not first and self.server.workers_wanted.is_set()):
+                    return False
+                if select.select([self.connection], [], [], min(remaining, IDLE_POLL_SECONDS))[0]:
+                    return bool(self.rfile.peek(1))  # Readable but empty - the client closed
+            return True
+        except OSError:
+            return False  # Reset by the client
+        finally:
+            self.connection.settimeout(REQUEST_TIMEOUT)
+    
+    def copyfile(self, source, outputfile):
+        """Static files go from the page cache to the socket without a copy through Python"""
+        # socket.sendfile uses os.sendfile where available and falls back to send()
+        self.connection.sendfile(source)
+    
     def do_GET(self):
         if self.path == '/api/stats':
-            # Export fresh stats
-            game_logger.export_to_json()
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            with open('web/game_stats.json', 'rb') as f:
-                self.wfile.write(f.read())
+            self.send_stats()
         else:
             super().do_GET()
     
+    def send_stats(self):
+        """Stats from memory, with 304 for clients that already have them"""
+        etag, last_modified, body, compressed = stats_cache.get()
+        
+        if self.not_modified(etag, last_modified):
+            self.send_response(304)
+            self.send_stats_headers(etag, last_modified)
+            self.end_headers()
+            return
+        
+        if compressed is not None and accepts_gzip(self.headers.get('Accept-Encoding')):
+            body = compressed
+            encoding = 'gzip'
+        else:
+            encoding = None
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_stats_headers(etag, last_modified)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_stats_headers(self, etag, last_modified):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', email.utils.formatdate(last_modified, usegmt=True))
+        # Browsers may keep a copy but must revalidate it on every poll
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+    
+    def not_modified(self, etag, last_modified):
+        """Conditional request check - If-None-Match wins over If-Modified-Since"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since is not None and since.timestamp() >= last_modified
+        return False
+    
     def do_POST(self):
         if self.path == '/api/payment':
             content_length = int(self.headers['Content-Length'])
@@ -36,23 +241,28 @@ class FightClubHandler(http.server.SimpleHTTPRequestHandler):
             data = json.loads(post_data)
             
             # Create payment
-            result = game_logger.create_payment(
-                data['username'],
-                data['type'],
-                data['amount'],
-                data['price']
-            )
+            with payment_lock:
+                result = game_logger.create_payment(
+                    data['username'],
+                    data['type'],
+                    data['amount'],
+                    data['price']
+                )
             
+            body = json.dumps(result).encode()
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
-            self.wfile.write(json.dumps(result).encode())
+            self.wfile.write(body)
+        else:
+            self.send_error(404)
 
 def start_server():
     os.makedirs('web', exist_ok=True)
     
-    with socketserver.TCPServer(("", PORT), FightClubHandler) as httpd:
+    with FightClubServer(("", PORT), FightClubHandler) as httpd:
         print(f"🌐 Server running at http://localhost:{PORT}")
         print(f"📊 View rankings at http://localhost:{PORT}/index.html")
         print("Press Ctrl+C to stop")